@@ -3,13 +3,36 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import os
+import random
+import tempfile
+import time
+import timeit
 import unittest
 
 import isolation
 import game_agent
+import clock
+import endgame
+import eval_cache
+import features
+import move_ordering
+import opening_book
 import sample_players
+import search_stats
+import tablebase
+import time_manager
+import transposition
 
 from importlib import reload
+from unittest import mock
+
+
+def countdown(limit):
+    """ Return a time_left() function for a move of `limit` milliseconds
+    starting now """
+    start = time.time()
+    return lambda: limit - 1000 * (time.time() - start)
 
 
 class IsolationTest(unittest.TestCase):
@@ -388,5 +411,1218 @@ class IsolationTest(unittest.TestCase):
         
 
 
+class KnightMovesTest(unittest.TestCase):
+    """Unit tests for the shared knight move tables"""
+
+    def test_shared_per_geometry(self):
+        board = isolation.Board("Player1", "Player2", 5, 3)
+        self.assertIs(board._knight_moves, board.copy()._knight_moves)
+        self.assertIsNot(board._knight_moves,
+                         isolation.Board("Player1", "Player2", 3, 5)._knight_moves)
+
+    def test_destinations_in_bounds(self):
+        width, height = 5, 3
+        table = isolation.isolation.get_knight_moves(width, height)
+        self.assertEqual(len(table), width * height)
+        for idx, destinations in enumerate(table):
+            r, c = idx % height, idx // height
+            expected = [(r + dr, c + dc) for dr, dc in
+                        [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                         (1, -2), (1, 2), (2, -1), (2, 1)]
+                        if 0 <= r + dr < height and 0 <= c + dc < width]
+            self.assertEqual([move for _, move in destinations], expected)
+            for dest, (row, col) in destinations:
+                self.assertEqual(dest, row + col * height)
+
+
+class PushPopMoveTest(unittest.TestCase):
+    """Unit tests for in-place make/unmake moves"""
+
+    def random_game(self, board_class, seed, plies):
+        rng = random.Random(seed)
+        game = board_class("Player1", "Player2", 7, 7)
+        for _ in range(plies):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        return game
+
+    def test_pop_restores_state(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = self.random_game(board_class, 1, 4)
+            history = []
+            rng = random.Random(2)
+            while game.get_legal_moves():
+                history.append((game.to_string(), game.hash(),
+                                game.active_player, game.move_count))
+                game.push_move(rng.choice(game.get_legal_moves()))
+            while history:
+                game.pop_move()
+                self.assertEqual(history.pop(), (game.to_string(), game.hash(),
+                                                 game.active_player, game.move_count))
+
+    def test_pushed_move_context(self):
+        game = self.random_game(isolation.Board, 3, 2)
+        before = game.to_string()
+        move = game.get_legal_moves()[0]
+        expected = game.forecast_move(move).to_string()
+        with game.pushed_move(move) as child:
+            self.assertEqual(child.to_string(), expected)
+            self.assertEqual(child.get_player_location(child.inactive_player), move)
+        self.assertEqual(game.to_string(), before)
+
+    def test_in_place_search_matches_copy(self):
+        for seed in range(5):
+            game = self.random_game(isolation.Board, seed, 6)
+            before = game.to_string()
+            moves = []
+            for in_place in (False, True):
+                alphabeta = game_agent.AlphaBetaPlayer(
+                    score_fn=sample_players.improved_score, in_place=in_place)
+                alphabeta.time_left = self.timeLeft
+                minimax = game_agent.MinimaxPlayer(
+                    score_fn=sample_players.improved_score, in_place=in_place)
+                minimax.time_left = self.timeLeft
+                moves.append((alphabeta.alphabeta(game, 4), minimax.minimax(game, 3)))
+                self.assertEqual(game.to_string(), before)
+            self.assertEqual(moves[0], moves[1])
+
+    def timeLeft(self):
+        return 1000
+
+
+class ZobristHashTest(unittest.TestCase):
+    """Unit tests for the incremental Zobrist hash"""
+
+    def test_incremental_matches_recomputed(self):
+        rng = random.Random(0)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            game = board_class("Player1", "Player2", 7, 7)
+            self.assertEqual(game.hash(), game._compute_hash())
+            while game.get_legal_moves():
+                game = game.forecast_move(rng.choice(game.get_legal_moves()))
+                self.assertEqual(game.hash(), game._compute_hash())
+
+    def test_transposition_same_hash(self):
+        game = isolation.Board("Player1", "Player2", 7, 7)
+        first = game.forecast_move((0, 0)).forecast_move((6, 6))
+        first = first.forecast_move((1, 2)).forecast_move((4, 5))
+        second = game.forecast_move((0, 0)).forecast_move((6, 6))
+        second = second.forecast_move((1, 2)).forecast_move((4, 5))
+        self.assertEqual(first.hash(), second.hash())
+        self.assertNotEqual(first.hash(), first.forecast_move((3, 3)).hash())
+        self.assertEqual(first.hash(), isolation.BitBoard.from_board(first).hash())
+
+    def test_replaced_board_state(self):
+        played = isolation.Board("Player1", "Player2", 5, 5)
+        for move in [(2, 2), (0, 0), (0, 1)]:
+            played.apply_move(move)
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        empty_hash = game.hash()
+        game._board_state = list(played._board_state)
+        game._active_player, game._inactive_player = "Player2", "Player1"
+        self.assertEqual(game.hash(), played.hash())
+        self.assertNotEqual(game.hash(), empty_hash)
+        self.assertEqual(game.copy().hash(), played.hash())
+        move = game.get_legal_moves()[0]
+        with game.pushed_move(move):
+            self.assertEqual(game.hash(), played.forecast_move(move).hash())
+        self.assertEqual(game.hash(), played.hash())
+
+    def test_collision_rate(self):
+        rng = random.Random(1)
+        states = {}
+        collisions = 0
+        for _ in range(200):
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            while game.get_legal_moves():
+                game.apply_move(rng.choice(game.get_legal_moves()))
+                state = tuple(game._board_state)
+                if states.setdefault(game.hash(), state) != state:
+                    collisions += 1
+        self.assertEqual(collisions, 0)
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """Unit tests for the transposition table and its use in alpha-beta"""
+
+    def test_probe_and_counters(self):
+        table = transposition.TranspositionTable(8)
+        self.assertIsNone(table.probe(5))
+        table.store(5, 3, 1.5, transposition.EXACT, (1, 2))
+        self.assertEqual(table.probe(5), (3, 1.5, transposition.EXACT, (1, 2)))
+        self.assertEqual((table.hits, table.misses, table.stores), (1, 1, 1))
+        self.assertEqual(table.hit_rate, 0.5)
+
+    def test_depth_preferred_and_always_replace(self):
+        table = transposition.TranspositionTable(2)
+        table.store(1, 5, 1., transposition.EXACT, (0, 0))
+        table.store(2, 2, 2., transposition.EXACT, (0, 1))
+        table.store(3, 1, 3., transposition.EXACT, (0, 2))
+        # the deep entry keeps its slot, the shallow ones share the other
+        self.assertEqual(table.probe(1)[0], 5)
+        self.assertIsNone(table.probe(2))
+        self.assertEqual(table.probe(3)[0], 1)
+        self.assertEqual(table.overwrites, 1)
+        self.assertEqual(len(table), 2)
+
+    def test_generation_aging(self):
+        table = transposition.TranspositionTable(2)
+        table.store(1, 5, 1., transposition.EXACT, (0, 0))
+        table.new_search()
+        table.store(2, 1, 2., transposition.EXACT, (0, 1))
+        self.assertEqual(table.probe(2)[0], 1)
+        self.assertEqual(table.probe(1), None)
+
+    def test_alphabeta_with_table(self):
+        rng = random.Random(4)
+        for _ in range(5):
+            game = isolation.Board("Player1", "Player2", 7, 7)
+            for _ in range(rng.randint(2, 12)):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            plain = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+            plain.time_left = lambda: 1000
+            cached = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                tt_size=4096)
+            cached.time_left = lambda: 1000
+            self.assertEqual(plain.alphabeta(game, 3), cached.alphabeta(game, 3))
+            self.assertGreater(cached.tt.stores, 0)
+            self.assertLessEqual(len(cached.tt), 4096)
+
+
+class MoveOrderingTest(unittest.TestCase):
+    """Unit tests for killer/history move ordering in alpha-beta"""
+
+    def test_stages(self):
+        ordering = move_ordering.MoveOrdering()
+        moves = [(0, 1), (1, 0), (2, 2), (3, 1)]
+        ordering.cutoff((3, 1), 2, 1)
+        ordering.cutoff((2, 2), 4, 3)
+        self.assertEqual(ordering.order(moves, 2, (1, 0)), [(1, 0), (3, 1), (2, 2), (0, 1)])
+        self.assertEqual(ordering.order(moves, 3), [(2, 2), (3, 1), (0, 1), (1, 0)])
+
+    def test_fewer_nodes_on_benchmark_positions(self):
+        rng = random.Random(7)
+        nodes = {}
+        for _ in range(6):
+            game = isolation.Board("Player1", "Player2", 7, 7)
+            for _ in range(6):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            for name, stages in [("plain", ()), ("ordered", ("hash", "killer", "history"))]:
+                player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                    move_ordering=stages)
+                player.time_left = lambda: 1000
+                for depth in range(1, 6):
+                    player.pv_move = player.alphabeta(game, depth)
+                    player.depth_nodes.append((depth, player.nodes))
+                self.assertEqual([depth for depth, _ in player.depth_nodes], [1, 2, 3, 4, 5])
+                nodes[name] = nodes.get(name, 0) + player.nodes
+        self.assertLess(nodes["ordered"], nodes["plain"])
+
+
+class PrincipalVariationSearchTest(unittest.TestCase):
+    """Unit tests for the negamax PVS search mode"""
+
+    def test_unknown_search(self):
+        self.assertRaises(ValueError, game_agent.AlphaBetaPlayer, search="mtd")
+
+    def test_matches_alphabeta_value(self):
+        rng = random.Random(5)
+        for _ in range(10):
+            game = isolation.Board("Player1", "Player2", 5, 5)
+            for _ in range(rng.randint(2, 8)):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            if not game.get_legal_moves():
+                continue
+            for depth in range(4):
+                values = []
+                for search in ("alphabeta", "pvs"):
+                    player = game_agent.AlphaBetaPlayer(
+                        score_fn=sample_players.improved_score, search=search,
+                        move_ordering=("hash", "killer", "history"))
+                    player.time_left = lambda: 1000
+                    player.searching_player = game.active_player
+                    if search == "pvs":
+                        values.append(player.pvs_score(game, depth))
+                    else:
+                        values.append(player.alphabeta_score(game, depth))
+                self.assertEqual(values[0], values[1])
+
+
+class AspirationWindowTest(unittest.TestCase):
+    """Unit tests for aspiration windows in iterative deepening"""
+
+    def test_same_scores_as_full_window(self):
+        rng = random.Random(6)
+        researches = 0
+        for _ in range(8):
+            game = isolation.Board("Player1", "Player2", 7, 7)
+            for _ in range(rng.randint(2, 10)):
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            for search in ("alphabeta", "pvs"):
+                full = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                  search=search)
+                narrow = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                    search=search, aspiration_window=0.5)
+                for player in (full, narrow):
+                    player.time_left = lambda: 1000
+                    for depth in range(1, 5):
+                        player.aspiration_search(game, depth)
+                self.assertEqual(full.root_score, narrow.root_score)
+                self.assertEqual([d for d, _, _ in narrow.depth_researches], [1, 2, 3, 4])
+                researches += sum(low + high for _, low, high in narrow.depth_researches)
+        self.assertGreater(researches, 0)
+
+    def test_invalid_growth(self):
+        self.assertRaises(ValueError, game_agent.AlphaBetaPlayer, aspiration_growth=1.)
+
+
+class PonderTest(unittest.TestCase):
+    """Unit tests for pondering on the opponent's time"""
+
+    def test_ponder_hit_continues_search(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                            tt_size=4096, ponder=True, ponder_time=100.)
+        try:
+            opponent = sample_players.GreedyPlayer()
+            game = isolation.Board(player, opponent)
+            game.apply_move((3, 3))
+            game.apply_move((2, 4))
+            move = player.get_move(game.copy(), countdown(50))
+            game.apply_move(move)
+            player.notify_move(game.copy(), move)
+            reply = player.ponder_move
+            self.assertIn(reply, game.get_legal_moves())
+            time.sleep(0.05)
+            game.apply_move(reply)
+            player.notify_move(game.copy(), reply)
+            self.assertEqual((player.ponder_hits, player.ponder_misses), (1, 0))
+            self.assertIsNotNone(player.ponder_result)
+            _, pondered_depth, pondered_move, _ = player.ponder_result
+            move = player.get_move(game.copy(), countdown(20))
+            self.assertIn(move, game.get_legal_moves())
+            # the search continues past the pondered depth, or returns its move
+            if player.depth_nodes:
+                self.assertGreater(player.depth_nodes[0][0], pondered_depth)
+            else:
+                self.assertEqual(move, pondered_move)
+        finally:
+            player.close()
+
+    def test_ponders_in_helper_process(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                            ponder=True, ponder_time=100.)
+        try:
+            self.assertIsInstance(player.tt, transposition.SharedTranspositionTable)
+            game = isolation.Board(player, sample_players.GreedyPlayer())
+            game.apply_move((3, 3))
+            game.apply_move((2, 4))
+            move = player.get_move(game.copy(), countdown(50))
+            game.apply_move(move)
+            player.notify_move(game.copy(), move)
+            process, _ = player._ponder_helper
+            self.assertTrue(process.is_alive())
+            self.assertNotEqual(process.pid, os.getpid())
+            # the pondered positions reach this process through the table
+            time.sleep(0.05)
+            player.stop_pondering()
+            self.assertIsNotNone(player.ponder_result)
+            self.assertIsNotNone(player.tt.probe(player.ponder_result[0] ^ player.tt_salt))
+        finally:
+            player.close()
+        self.assertIsNone(player._ponder_helper)
+
+    def test_play_notifies_players(self):
+        # the opponent runs in this process, so pondering must not take its
+        # time away
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                            tt_size=2**14, ponder=True)
+        try:
+            opponent = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+            game = isolation.Board(opponent, player)
+            winner, history, termination = game.play(time_limit=150)
+            self.assertNotEqual(termination, "timeout")
+            self.assertGreater(player.ponder_hits + player.ponder_misses, 0)
+        finally:
+            player.close()
+
+
+class LazySMPTest(unittest.TestCase):
+    """Unit tests for the shared transposition table and Lazy SMP search"""
+
+    def test_shared_table_matches_local_table(self):
+        shared = transposition.SharedTranspositionTable(2)
+        local = transposition.TranspositionTable(2)
+        try:
+            self.assertIsNone(shared.probe(0))
+            for table in (shared, local):
+                table.store(0, 5, -1.5, transposition.LOWER, (-1, -1))
+                table.store(2, 2, 2., transposition.EXACT, (0, 1))
+                table.store(4, 1, 3., transposition.UPPER, (6, 2))
+            for key in (0, 2, 4):
+                self.assertEqual(shared.probe(key), local.probe(key))
+            self.assertEqual(len(shared), len(local))
+            self.assertEqual(shared.overwrites, local.overwrites)
+        finally:
+            shared.close()
+
+    def test_helpers_report_nodes(self):
+        # run a helper even on a single core machine
+        with mock.patch("os.cpu_count", return_value=2):
+            player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                move_ordering=("hash", "killer"), workers=2)
+        self.assertEqual(player.workers, 2)
+        try:
+            game = isolation.Board(player, sample_players.GreedyPlayer())
+            game.apply_move((3, 3))
+            game.apply_move((2, 4))
+            # a report that is late is skipped rather than waited for, so
+            # allow a few moves for one to arrive
+            reports = []
+            for _ in range(3):
+                start = time.time()
+                time_left = lambda: 100 - 1000 * (time.time() - start)
+                move = player.get_move(game, time_left)
+                self.assertGreater(time_left(), 0)
+                self.assertIn(move, game.get_legal_moves())
+                self.assertEqual(len(player.worker_nodes), 2)
+                self.assertEqual(player.worker_nodes[0], player.nodes)
+                reports.append(player.worker_nodes[1])
+            self.assertTrue(any(reports))
+            self.assertGreater(len(player.tt), 0)
+        finally:
+            player.close()
+
+    def test_workers_limited_to_cpu_count(self):
+        cpus = os.cpu_count() or 1
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                            move_ordering=("hash", "killer"),
+                                            workers=cpus + 1)
+        try:
+            self.assertEqual(player.workers, cpus)
+            opponent = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+            game = isolation.Board(player, opponent)
+            winner, history, outcome = game.play(time_limit=150)
+            self.assertNotEqual((winner, outcome), (opponent, "timeout"))
+        finally:
+            player.close()
+
+
+class EndgameTest(unittest.TestCase):
+    """Unit tests for the partitioned endgame solver"""
+
+    # a 5x5 game where the players are partitioned; player 2 is to move and
+    # only wins by moving to (0, 1), which starts a 3-move path against 2
+    MOVES = [(1, 0), (2, 1), (3, 1), (4, 2), (1, 2), (2, 3), (3, 3), (1, 1),
+             (1, 4), (3, 2), (2, 2), (2, 0), (4, 3)]
+
+    def setUp(self):
+        self.player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+        self.game = isolation.Board(sample_players.GreedyPlayer(), self.player, 5, 5)
+        for move in self.MOVES:
+            self.game.apply_move(move)
+
+    def test_partition_detection(self):
+        self.assertTrue(endgame.is_partitioned(self.game))
+        self.assertTrue(endgame.is_partitioned(isolation.BitBoard.from_board(self.game)))
+        game = isolation.Board("player_1", "player_2", 5, 5)
+        self.assertFalse(endgame.is_partitioned(game))
+        game.apply_move((2, 2))
+        game.apply_move((0, 0))
+        self.assertFalse(endgame.is_partitioned(game))
+
+    def test_solver(self):
+        solver = endgame.LongestPathSolver()
+        self.assertEqual(solver.solve(self.game), ((0, 1), 3, 2))
+
+    def test_player_uses_solver(self):
+        start = time.time()
+        move = self.player.get_move(self.game, lambda: 100 - 1000 * (time.time() - start))
+        self.assertEqual(move, (0, 1))
+        self.assertEqual(self.player.endgame_result, (3, 2))
+        self.assertEqual(self.player.root_score, float("inf"))
+
+    def test_solver_under_node_budget(self):
+        def collapsing_timer():
+            # plenty of time when the solve starts, none at its first check
+            readings = iter([100.])
+            return lambda: next(readings, 0.)
+
+        for node_budget, result in ((1000, (3, 2)), (8, None)):
+            results = set()
+            for time_left in (lambda: 100., collapsing_timer()):
+                player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                                    node_budget=node_budget)
+                player.endgame_solver = endgame.LongestPathSolver(check_interval=1)
+                game = isolation.Board(sample_players.GreedyPlayer(), player, 5, 5)
+                for move in self.MOVES:
+                    game.apply_move(move)
+                move = player.get_move(game, time_left)
+                self.assertEqual(player.endgame_result, result)
+                results.add((move, player.nodes))
+            self.assertEqual(len(results), 1)
+
+
+class MCTSTest(unittest.TestCase):
+    """Unit tests for the Monte Carlo tree search player"""
+
+    def test_get_move_and_statistics(self):
+        player = game_agent.MCTSPlayer(seed=0)
+        opponent = sample_players.GreedyPlayer()
+        game = isolation.Board(player, opponent)
+        time_left = countdown(100)
+        move = player.get_move(game, time_left)
+        self.assertGreater(time_left(), 0)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.rollouts, player.iterations * player.batch_size)
+        self.assertGreater(player.rollouts_per_second, 0)
+        self.assertEqual(player.tree_size, player.count_nodes(player.root))
+
+    def test_tree_reuse(self):
+        player = game_agent.MCTSPlayer(seed=0)
+        opponent = sample_players.GreedyPlayer()
+        game = isolation.Board(player, opponent)
+        for move in [(2, 3), (3, 3), (0, 2), (1, 1)]:
+            game.apply_move(move)
+        game.apply_move(player.get_move(game, countdown(100)))
+        game.apply_move(opponent.get_move(game, countdown(100)))
+        player.get_move(game, countdown(100))
+        self.assertGreater(player.reused_nodes, 1)
+
+    def test_finds_winning_move(self):
+        player = game_agent.MCTSPlayer(seed=0)
+        game = isolation.Board(sample_players.GreedyPlayer(), player, 5, 5)
+        for move in EndgameTest.MOVES:
+            game.apply_move(move)
+        self.assertEqual(player.get_move(game, countdown(100)), (0, 1))
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Unit tests for the opening book builder and reader"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "book.bin")
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+        cls.count = opening_book.build_book(cls.path, player, 5, 5, plies=2, depth=3)
+        cls.book = opening_book.OpeningBook(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.book.close()
+        cls.directory.cleanup()
+
+    def test_symmetry_reduction(self):
+        # 25 first moves fall into 6 classes on a 5x5 board
+        self.assertEqual(self.count, 1 + 6)
+        self.assertEqual(len(self.book), self.count)
+        for perm in opening_book.get_symmetries(5, 5):
+            self.assertEqual(sorted(perm), list(range(25)))
+        corners = []
+        for move in [(0, 0), (0, 4), (4, 0), (4, 4)]:
+            game = isolation.Board("player_1", "player_2", 5, 5)
+            game.apply_move(move)
+            corners.append(opening_book.canonical_key(game)[0])
+        self.assertEqual(len(set(corners)), 1)
+
+    def test_lookup_maps_moves_back(self):
+        for first in [(0, 0), (4, 4), (1, 3), (3, 1)]:
+            game = isolation.Board("player_1", "player_2", 5, 5)
+            game.apply_move(first)
+            move = self.book.lookup(game)
+            self.assertIn(move, game.get_legal_moves())
+            game.apply_move(move)
+            self.assertIsNone(self.book.lookup(game))
+        # symmetric positions get symmetric replies
+        game = isolation.Board("player_1", "player_2", 5, 5)
+        game.apply_move((0, 0))
+        row, col = self.book.lookup(game)
+        game = isolation.Board("player_1", "player_2", 5, 5)
+        game.apply_move((4, 4))
+        row2, col2 = self.book.lookup(game)
+        images = [perm[row + col * 5] for perm in opening_book.get_symmetries(5, 5)
+                  if perm[0] == 24]
+        self.assertIn(row2 + col2 * 5, images)
+
+    def test_player_uses_book(self):
+        player = game_agent.AlphaBetaPlayer(opening_book=self.book)
+        game = isolation.Board(player, sample_players.GreedyPlayer(), 5, 5)
+        move = player.get_move(game, lambda: 1000.)
+        self.assertEqual(move, self.book.lookup(game))
+        self.assertEqual(player.nodes, 0)
+
+
+class TablebaseTest(unittest.TestCase):
+    """Unit tests for the endgame tablebase generator and reader"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        tablebase.generate(cls.directory.name, 5, 5, max_cells=3, processes=2, num_chunks=4)
+        cls.tables = tablebase.Tablebase(cls.directory.name, max_blanks=25)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tables.close()
+        cls.directory.cleanup()
+
+    def solve(self, game):
+        """ Return (active player wins, plies to the end) by plain search. """
+        moves = game.get_legal_moves()
+        if not moves:
+            return False, 0
+        results = [self.solve(game.forecast_move(move)) for move in moves]
+        wins = [distance for won, distance in results if not won]
+        if wins:
+            return True, 1 + min(wins)
+        return False, 1 + max(distance for _, distance in results)
+
+    def test_matches_search(self):
+        checked = 0
+        for seed in range(300):
+            rng = random.Random(seed)
+            game = isolation.Board("player_1", "player_2", 5, 5)
+            while game.get_legal_moves():
+                entry = self.tables.probe(game)
+                if entry is not None:
+                    self.assertEqual(entry, self.solve(game))
+                    checked += 1
+                    break
+                game.apply_move(rng.choice(game.get_legal_moves()))
+        self.assertGreater(checked, 0)
+        self.assertEqual(self.tables.hits, self.tables.probes)
+
+    def test_resume(self):
+        # finished levels are kept, and missing chunks are solved again
+        level_1 = tablebase.level_path(self.directory.name, 1)
+        level_3 = tablebase.level_path(self.directory.name, 3)
+        with open(level_3, "rb") as table_file:
+            expected = table_file.read()
+        mtime = os.path.getmtime(level_1)
+        os.remove(level_3)
+        tablebase.generate(self.directory.name, 5, 5, max_cells=3, processes=1, num_chunks=4)
+        self.assertEqual(os.path.getmtime(level_1), mtime)
+        with open(level_3, "rb") as table_file:
+            self.assertEqual(table_file.read(), expected)
+
+    def test_player_probes_tables(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                            endgame=False, tablebase=self.tables)
+        rng = random.Random(1)
+        game = isolation.Board(player, "opponent", 5, 5)
+        while self.tables.probe(game) is None:
+            if not game.get_legal_moves():
+                game = isolation.Board(player, "opponent", 5, 5)
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        hits = self.tables.hits
+        player.time_left = lambda: 1000.
+        player.alphabeta(game, 2)
+        self.assertGreater(self.tables.hits, hits)
+
+
+class TimeManagerTest(unittest.TestCase):
+    """ Test the adaptive time management of iterative deepening """
+
+    def setUp(self):
+        reload(game_agent)
+        self.manager = time_manager.TimeManager()
+        self.player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, tt_size=2**12,
+            time_manager=self.manager)
+
+    def test_stops_between_passes(self):
+        game = isolation.Board(self.player, "opponent")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        # a clock that counts 5 us per node makes the passes take the same
+        # time on any machine; on a real clock, whether the next pass fits
+        # depends on the speed of the machine
+        node_clock = lambda: self.player.nodes * 5e-6
+        time_left = lambda: 150 - 1000 * node_clock()
+        with mock.patch.object(timeit, "default_timer", node_clock):
+            move = self.player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(time_left(), 0)
+        self.assertEqual(sum(self.manager.stops.values()), 1)
+        self.assertEqual(self.player.wasted_nodes, 0)
+
+    def test_forced_move(self):
+        rng = random.Random(0)
+        game = isolation.Board(self.player, "opponent")
+        while len(game.get_legal_moves()) != 1 or game.active_player != self.player:
+            if not game.get_legal_moves():
+                game = isolation.Board(self.player, "opponent")
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        forced = game.get_legal_moves()
+        self.assertEqual(self.player.get_move(game, lambda: 150.), forced[0])
+        self.assertEqual(self.manager.stops["forced"], 1)
+        self.assertEqual(self.player.nodes, 0)
+
+    def test_game_clock_budget(self):
+        manager = time_manager.TimeManager(game_clock=True, max_ratio=2.)
+        game = isolation.Board("player_1", "player_2")
+        time_left = manager.start(game, lambda: 10000., 10.)
+        # 49 blank cells: an even share over 12 moves, at most twice that
+        self.assertAlmostEqual(manager.budget, 10000. / 12)
+        self.assertLessEqual(time_left(), 2 * manager.budget)
+        self.assertGreater(time_left(), manager.budget)
+
+
+class SearchClockTest(unittest.TestCase):
+    """ Test the amortized polling of time_left() """
+
+    def test_polls_less_often_than_nodes(self):
+        calls = []
+
+        def time_left():
+            calls.append(None)
+            return 1000.
+
+        search_clock = clock.SearchClock(time_left, 10.)
+        for _ in range(10000):
+            self.assertFalse(search_clock.expired())
+        self.assertEqual(len(calls), search_clock.polls)
+        self.assertLess(search_clock.polls, 100)
+
+    def test_stops_within_threshold(self):
+        start = time.time()
+        time_left = lambda: 50 - 1000 * (time.time() - start)
+        search_clock = clock.SearchClock(time_left, 10.)
+        while not search_clock.expired():
+            sum(range(100))
+        self.assertLess(time_left(), 10.)
+        self.assertGreater(time_left(), 0.)
+
+    def test_player_clock_follows_time_left(self):
+        player = game_agent.AlphaBetaPlayer()
+        self.assertIsNone(player.clock)
+        time_left = lambda: float("-inf")
+        player.time_left = time_left
+        self.assertIs(player.clock.time_left, time_left)
+        game = isolation.Board(player, "opponent")
+        self.assertRaises(game_agent.SearchTimeout, player.alphabeta, game, 1)
+
+
+class SearchStatsTest(unittest.TestCase):
+    """ Test the per-move search statistics """
+
+    def setUp(self):
+        reload(game_agent)
+        self.player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, tt_size=2**12,
+            move_ordering=("hash", "killer", "history"))
+        self.game = isolation.Board(self.player, "opponent")
+        self.game.apply_move((3, 3))
+        self.game.apply_move((2, 2))
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self.player.stats)
+        self.assertIs(self.player.score, sample_players.improved_score)
+
+    def test_counters_and_callback(self):
+        recorded = []
+        stats = search_stats.SearchStats(recorded.append).attach(self.player)
+        self.assertIs(self.player.stats, stats)
+        self.player.get_move(self.game, countdown(100))
+        self.assertEqual(recorded, [stats])
+        self.assertEqual(stats.moves, 1)
+        self.assertEqual(stats.nodes, self.player.nodes)
+        self.assertEqual(stats.depth, self.player.depth_nodes[-1][0])
+        self.assertGreater(stats.leaves, 0)
+        self.assertGreater(stats.tt_hits, 0)
+        self.assertGreater(sum(stats.cutoffs), 0)
+        self.assertGreater(stats.nodes_per_second, 0)
+        self.assertGreater(stats.time, 0)
+
+        # counters are reset for each move
+        self.game.apply_move(self.player.get_move(self.game, countdown(100)))
+        self.game.apply_move(self.game.get_legal_moves()[0])
+        self.player.get_move(self.game, countdown(100))
+        self.assertEqual(stats.moves, 3)
+        self.assertEqual(stats.nodes, self.player.nodes)
+        self.assertEqual(len(recorded), 3)
+
+
+class NodeBudgetTest(unittest.TestCase):
+    """ Test the deterministic termination of search by node budget """
+
+    def setUp(self):
+        reload(game_agent)
+
+    def search(self, player, time_left):
+        game = isolation.Board(player, "opponent")
+        for move in [(3, 3), (2, 2), (1, 4), (4, 3)]:
+            game.apply_move(move)
+        return player.get_move(game, time_left)
+
+    def test_alphabeta_node_budget_is_deterministic(self):
+        results = set()
+        for time_left in (lambda: 1000., lambda: 15., lambda: float("-inf")):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, tt_size=2**12,
+                move_ordering=("hash", "killer", "history"), node_budget=2000)
+            move = self.search(player, time_left)
+            self.assertEqual(player.clock.nodes, 2001)
+            results.add((move, player.nodes, tuple(player.depth_nodes)))
+        self.assertEqual(len(results), 1)
+        self.assertGreater(len(results.pop()[2]), 1)
+
+    def test_fixed_depth(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, node_budget=float("inf"),
+            max_depth=4)
+        self.search(player, lambda: float("-inf"))
+        self.assertEqual([depth for depth, _ in player.depth_nodes], [1, 2, 3, 4])
+        self.assertRaises(ValueError, game_agent.AlphaBetaPlayer,
+                          node_budget=float("inf"))
+
+    def test_minimax_without_timer(self):
+        timed = game_agent.MinimaxPlayer(score_fn=sample_players.improved_score)
+        untimed = game_agent.MinimaxPlayer(score_fn=sample_players.improved_score,
+                                           node_budget=float("inf"))
+        self.assertEqual(self.search(untimed, lambda: float("-inf")),
+                         self.search(timed, lambda: 1000.))
+
+
+class SearchExtensionTest(unittest.TestCase):
+    """ Test the forced-move and singular-reply search extensions """
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_extended_move(self):
+        player = game_agent.AlphaBetaPlayer(extensions=("forced", "singular"))
+        plain = game_agent.AlphaBetaPlayer()
+        rng = random.Random(0)
+        kinds = set()
+        for _ in range(200):
+            game = isolation.Board("player_1", "player_2", 5, 5)
+            while len(game.get_legal_moves()) > 0:
+                moves = game.get_legal_moves()
+                alive = [move for move in moves
+                         if game.forecast_move(move).get_legal_moves(game.active_player)]
+                expected = None
+                if len(moves) == 1:
+                    expected = moves[0]
+                    kinds.add("forced")
+                elif len(alive) == 1:
+                    expected = alive[0]
+                    kinds.add("singular")
+                self.assertEqual(player.extended_move(game, moves), expected)
+                self.assertIsNone(plain.extended_move(game, moves))
+                game.apply_move(rng.choice(moves))
+        self.assertEqual(kinds, {"forced", "singular"})
+
+    def test_extensions_are_capped(self):
+        for search in ("alphabeta", "pvs"):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, search=search,
+                extensions=("forced", "singular"), max_extension=2,
+                node_budget=float("inf"), max_depth=3, endgame=False)
+            game = isolation.Board(player, "opponent", 5, 5)
+            for move in [(2, 2), (0, 0), (0, 1), (1, 2), (2, 0), (3, 1)]:
+                game.apply_move(move)
+            move = player.get_move(game, lambda: 1000.)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(player._extension, 0)
+        self.assertRaises(ValueError, game_agent.AlphaBetaPlayer, extensions=("check",))
+
+
+class MTDFTest(unittest.TestCase):
+    """ Test the MTD(f) search driver """
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_matches_minimax_value(self):
+        rng = random.Random(0)
+        for _ in range(10):
+            seed = rng.random()
+            values = []
+            for search, tt_size in (("alphabeta", 0), ("mtdf", 2**12)):
+                player = game_agent.AlphaBetaPlayer(
+                    score_fn=sample_players.improved_score, search=search,
+                    tt_size=tt_size, node_budget=float("inf"), max_depth=4,
+                    endgame=False)
+                game = isolation.Board(player, "opponent", 5, 5)
+                moves = random.Random(seed)
+                while game.move_count < 6 or game.active_player != player:
+                    if not game.get_legal_moves():
+                        game = isolation.Board(player, "opponent", 5, 5)
+                    game.apply_move(moves.choice(game.get_legal_moves()))
+                player.get_move(game, lambda: 1000.)
+                values.append(player.root_score)
+            self.assertEqual(values[0], values[1])
+
+    def test_uses_table_and_counts_searches(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, search="mtdf",
+            node_budget=float("inf"), max_depth=5)
+        self.assertIsNotNone(player.tt)
+        game = isolation.Board(player, "opponent")
+        for move in [(3, 3), (2, 2), (1, 4), (4, 3)]:
+            game.apply_move(move)
+        self.assertIn(player.get_move(game, lambda: 1000.), game.get_legal_moves())
+        self.assertEqual(player.depth_researches[0], (1, 0, 0))
+        for depth, fail_lows, fail_highs in player.depth_researches[1:]:
+            self.assertGreater(fail_highs, 0)
+
+
+class LateMoveReductionTest(unittest.TestCase):
+    """ Test late move reductions in alpha-beta search """
+
+    def setUp(self):
+        reload(game_agent)
+
+    def search(self, search, reductions):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, search=search,
+            move_ordering=("hash", "killer", "history"), tt_size=2**12,
+            reductions=reductions, node_budget=float("inf"), max_depth=6)
+        game = isolation.Board(player, "opponent")
+        for move in [(3, 3), (2, 2), (1, 4), (4, 3)]:
+            game.apply_move(move)
+        move = player.get_move(game, lambda: 1000.)
+        self.assertIn(move, game.get_legal_moves())
+        return player
+
+    def test_reduction_table(self):
+        table = game_agent.reduction_table(start=2, max_depth=8)
+        self.assertEqual(len(table), 9)
+        for depth, row in enumerate(table):
+            self.assertEqual(row[:2], [0, 0])
+            for reduction in row:
+                self.assertLessEqual(reduction, max(0, depth - 1))
+            if depth >= 2:
+                self.assertGreater(row[2], 0)
+
+    def test_reduced_search(self):
+        for search in ("alphabeta", "pvs"):
+            full = self.search(search, None)
+            zero = self.search(search, [[0] * 8])
+            reduced = self.search(search, game_agent.reduction_table())
+            self.assertEqual(full.reduced_moves, 0)
+            self.assertEqual(zero.nodes, full.nodes)
+            self.assertGreater(reduced.reduced_moves, 0)
+            self.assertLessEqual(reduced.reduction_researches, reduced.reduced_moves)
+            self.assertLess(reduced.nodes, full.nodes)
+
+    def test_killer_plies(self):
+        # reduced and extended children keep the ply of their distance from
+        # the root, whatever depth they are searched to
+        for search in ("alphabeta", "pvs"):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, search=search,
+                move_ordering=("hash", "killer", "history"), tt_size=2**12,
+                reductions=game_agent.reduction_table(),
+                extensions=("forced", "singular"), node_budget=float("inf"),
+                max_depth=6)
+            game = isolation.Board(player, "opponent")
+            for move in [(3, 3), (2, 2), (1, 4), (4, 3)]:
+                game.apply_move(move)
+            counts, plies = [], []
+            order, score_fn = player.ordering.order, getattr(player, search + "_score")
+
+            def record_order(moves, ply, hash_move):
+                plies.append((ply, counts[-1] - game.move_count))
+                return order(moves, ply, hash_move)
+
+            def record_score(node, *args, **kwargs):
+                counts.append(node.move_count)
+                try:
+                    return score_fn(node, *args, **kwargs)
+                finally:
+                    counts.pop()
+
+            player.ordering.order = record_order
+            setattr(player, search + "_score", record_score)
+            player.get_move(game, lambda: 1000.)
+            self.assertGreater(player.reduced_moves, 0)
+            self.assertTrue(plies)
+            for ply, distance in plies:
+                self.assertEqual(ply, distance)
+
+
+class EvaluationCacheTest(unittest.TestCase):
+    """ Test the memoizing score function wrapper """
+
+    def setUp(self):
+        self.calls = []
+
+    def score(self, game, player):
+        self.calls.append((game.hash(), player))
+        return sample_players.improved_score(game, player)
+
+    def test_memoizes_scores(self):
+        cache = eval_cache.EvaluationCache(self.score)
+        game = isolation.Board("player_1", "player_2")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        for player in ("player_1", "player_2", "player_1"):
+            self.assertEqual(cache(game, player),
+                             sample_players.improved_score(game, player))
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertAlmostEqual(cache.hit_rate(), 1 / 3)
+
+    def test_evicts_least_recently_used(self):
+        cache = eval_cache.EvaluationCache(self.score, size=2)
+        games = []
+        for move in [(0, 0), (1, 1), (2, 2)]:
+            games.append(isolation.Board("player_1", "player_2").forecast_move(move))
+        cache(games[0], "player_1")
+        cache(games[1], "player_1")
+        cache(games[0], "player_1")
+        cache(games[2], "player_1")
+        self.assertEqual(len(cache), 2)
+        cache(games[0], "player_1")
+        self.assertEqual(len(self.calls), 3)
+        cache(games[1], "player_1")
+        self.assertEqual(len(self.calls), 4)
+
+    def test_wraps_player_score(self):
+        # self.score has no batch form, so every leaf goes through the cache
+        cache = eval_cache.EvaluationCache(self.score)
+        player = game_agent.AlphaBetaPlayer(score_fn=cache)
+        game = isolation.Board(player, "opponent")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        start = time.time()
+        move = player.get_move(game, lambda: 100 - 1000 * (time.time() - start))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(cache.misses, 0)
+
+    def test_forwards_batch(self):
+        self.assertFalse(hasattr(eval_cache.EvaluationCache(self.score), "batch"))
+        cache = eval_cache.EvaluationCache(sample_players.improved_score)
+        self.assertIs(cache.batch, sample_players.improved_score.batch)
+        game = isolation.Board("player_1", "player_2")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        moves = game.get_legal_moves()
+        scores = [cache(game.forecast_move(move), "player_1") for move in moves]
+        self.assertEqual(cache.batch(game, "player_1", moves), scores)
+        player = game_agent.AlphaBetaPlayer(score_fn=cache)
+        game = isolation.Board(player, "opponent")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        start = time.time()
+        move = player.get_move(game, lambda: 100 - 1000 * (time.time() - start))
+        self.assertIn(move, game.get_legal_moves())
+
+
+class MobilityTest(unittest.TestCase):
+    """Check that Board.mobility() counts the legal moves of each player"""
+
+    def assertMobility(self, game):
+        for player in ("Player1", "Player2"):
+            self.assertEqual(game.mobility(player), len(game.get_legal_moves(player)))
+        self.assertEqual(game.mobility(), len(game.get_legal_moves()))
+
+    def test_matches_legal_moves(self):
+        rng = random.Random(0)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            for width, height in [(7, 7), (5, 9), (3, 3)]:
+                game = board_class("Player1", "Player2", width, height)
+                pushed = 0
+                while True:
+                    self.assertMobility(game)
+                    moves = game.get_legal_moves()
+                    if not moves:
+                        break
+                    move = rng.choice(moves)
+                    if rng.random() < .5:
+                        game.push_move(move)
+                        pushed += 1
+                    else:
+                        game = game.forecast_move(move)
+                        pushed = 0
+                for _ in range(pushed):
+                    game.pop_move()
+                    self.assertMobility(game)
+
+    def test_replaced_board_state(self):
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        for move in [(2, 2), (0, 0), (0, 1)]:
+            game.apply_move(move)
+        game._board_state = [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0,
+                             0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 12, 4]
+        self.assertMobility(game)
+        self.assertMobility(game.copy())
+        with game.pushed_move(game.get_legal_moves()[0]):
+            self.assertMobility(game)
+        self.assertMobility(game)
+
+
+class BatchScoreTest(unittest.TestCase):
+    """ Test scoring all the children of a position at once """
+
+    def setUp(self):
+        reload(game_agent)
+
+    def positions(self, board_class):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 5)]:
+            game = board_class("Player1", "Player2", width, height)
+            while True:
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                yield game, moves
+                game = game.forecast_move(rng.choice(moves))
+
+    def test_move_mobilities(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            for game, moves in self.positions(board_class):
+                mover, opponent = game.active_player, game.inactive_player
+                expected = [(child.mobility(mover), child.mobility(opponent))
+                            for child in map(game.forecast_move, moves)]
+                self.assertEqual(game.move_mobilities(moves), expected)
+
+    def test_batch_matches_score(self):
+        score_fns = [sample_players.open_move_score, sample_players.improved_score,
+                     game_agent.custom_score, game_agent.custom_score_3]
+        for board_class in (isolation.Board, isolation.BitBoard):
+            for game, moves in self.positions(board_class):
+                for score_fn in score_fns:
+                    for player in ("Player1", "Player2"):
+                        expected = [score_fn(game.forecast_move(move), player)
+                                    for move in moves]
+                        self.assertEqual(score_fn.batch(game, player, moves), expected)
+
+    def test_search_unchanged(self):
+        unbatched = lambda game, player: sample_players.improved_score(game, player)
+        for search in ("alphabeta", "pvs"):
+            results = []
+            for score_fn in (sample_players.improved_score, unbatched):
+                player = game_agent.AlphaBetaPlayer(
+                    score_fn=score_fn, search=search, tt_size=2**12,
+                    node_budget=float("inf"), max_depth=5)
+                game = isolation.Board(player, "opponent")
+                for move in [(3, 3), (2, 2), (1, 4), (4, 3)]:
+                    game.apply_move(move)
+                move = player.get_move(game, lambda: 1000.)
+                results.append((move, player.nodes, player.root_score))
+            self.assertEqual(results[0], results[1])
+
+    def test_greedy_player(self):
+        rng = random.Random(1)
+        player = sample_players.GreedyPlayer(sample_players.improved_score)
+        game = isolation.Board(player, "opponent")
+        while True:
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            if game.active_player == player:
+                expected = max((sample_players.improved_score(game.forecast_move(m), player), m)
+                               for m in moves)[1]
+                self.assertEqual(player.get_move(game, lambda: 1000.), expected)
+            game.apply_move(rng.choice(moves))
+
+
+class FeatureScoreTest(unittest.TestCase):
+    """ Test the precomputed cell features and the heuristics built on them """
+
+    def positions(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 8)]:
+            game = isolation.Board("Player1", "Player2", width, height)
+            while True:
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                yield game, moves
+                game = game.forecast_move(rng.choice(moves))
+
+    def test_features(self):
+        table = features.get_features(7, 7)
+        self.assertIs(features.get_features(7, 7), table)
+        corner, center = 0, 3 + 3 * 7
+        self.assertEqual((table.degree[corner], table.degree[center]), (2, 8))
+        self.assertEqual((table.edge[corner], table.edge[1 + 7], table.edge[center]), (2, 1, 0))
+        self.assertEqual((table.corner[1 + 7], table.corner[2]), (1, 0))
+        for width, height in [(7, 7), (5, 8)]:
+            table = features.get_features(width, height)
+            game = isolation.Board("Player1", "Player2", width, height)
+            for idx in range(width * height):
+                y, x = idx % height, idx // height
+                self.assertEqual(table.center[idx],
+                                 float((height / 2. - y)**2 + (width / 2. - x)**2))
+                self.assertEqual(table.degree[idx], len(game.forecast_move((y, x)).get_legal_moves("Player1")))
+
+    def test_feature_score(self):
+        improved = features.feature_score()
+        center = features.feature_score(own_moves=0., opp_moves=0., own={"center": 1.})
+        mixed = features.feature_score(own_moves=2., opp_moves=-1.5,
+                                       own={"degree": .5, "edge": -1.}, opp={"corner": 2.})
+        # weights that round, so the batch must add the terms like score()
+        inexact = features.feature_score(own_moves=.3, opp_moves=-.7,
+                                         own={"center": .1, "degree": .3},
+                                         opp={"center": -.2, "edge": .7})
+        for game, moves in self.positions():
+            for player in ("Player1", "Player2"):
+                self.assertEqual(improved(game, player), sample_players.improved_score(game, player))
+                if game.get_player_location(player) is not None:
+                    self.assertEqual(center(game, player), sample_players.center_score(game, player))
+                for score_fn in (improved, center, mixed, inexact):
+                    expected = [score_fn(game.forecast_move(move), player) for move in moves]
+                    self.assertEqual(score_fn.batch(game, player, moves), expected)
+        with self.assertRaises(ValueError):
+            features.feature_score(own={"area": 1.})
+
+
+class LostPositionTest(unittest.TestCase):
+    """ Test that a lost player still plays a legal move """
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_every_move_loses(self):
+        for search in ("alphabeta", "pvs", "mtdf"):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, search=search,
+                node_budget=float("inf"), max_depth=4)
+            game = isolation.Board(player, "opponent", 5, 5)
+            for move in [(3, 0), (0, 4), (4, 2), (1, 2), (2, 3), (2, 4), (3, 1),
+                         (4, 3), (1, 0), (2, 2), (0, 2), (3, 4), (2, 1), (1, 3)]:
+                game.apply_move(move)
+            move = player.get_move(game, lambda: 1000.)
+            self.assertEqual(player.root_score, float("-inf"))
+            self.assertIn(move, game.get_legal_moves())
+
+
+class BitBoardTest(unittest.TestCase):
+    """Check that isolation.BitBoard is a drop-in for isolation.Board"""
+
+    def test_matches_board(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 9), (9, 4), (3, 3)]:
+            board = isolation.Board("Player1", "Player2", width, height)
+            bitboard = isolation.BitBoard("Player1", "Player2", width, height)
+            while True:
+                moves = board.get_legal_moves()
+                self.assertEqual(sorted(moves), sorted(bitboard.get_legal_moves()))
+                self.assertEqual(sorted(board.get_legal_moves(board.inactive_player)),
+                                 sorted(bitboard.get_legal_moves(bitboard.inactive_player)))
+                self.assertEqual(board.to_string(), bitboard.to_string())
+                self.assertEqual(board.utility("Player1"), bitboard.utility("Player1"))
+                self.assertEqual(isolation.BitBoard.from_board(board).hash(), bitboard.hash())
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                board.apply_move(move)
+                bitboard = bitboard.forecast_move(move)
+
+    def test_play(self):
+        player1 = sample_players.GreedyPlayer()
+        player2 = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+        game = isolation.BitBoard(player1, player2)
+        winner, history, termination = game.play()
+        self.assertIn(winner, (player1, player2))
+        self.assertNotEqual(termination, "timeout")
+
+
 if __name__ == '__main__':
     unittest.main()
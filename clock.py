@@ -0,0 +1,108 @@
+"""This file contains the search clock shared by the game-playing agents.
+
+Reading the time_left() function passed to get_move() at every node costs a
+timer call and some float arithmetic, which is a measurable share of the
+cost of a node. A `SearchClock` only reads it every `interval` nodes, and
+adapts the interval to the measured node rate so that the time between two
+reads stays below a fraction of the safety margin (and of the time left
+before it): the search still stops within about one node of reaching the
+player's `TIMER_THRESHOLD`, however fast or slow its nodes are.
+"""
+import timeit
+
+
+class SearchClock(object):
+    """Poll a time_left() function every few nodes.
+
+    Parameters
+    ----------
+    time_left : callable
+        A function that returns the number of milliseconds left in the
+        current turn.
+
+    threshold : float
+        The search must stop when fewer milliseconds than this are left.
+
+    poll_fraction : float (optional)
+        The polling interval is chosen so that, at the measured node rate,
+        at most this fraction of the threshold (or of the time left above
+        it, if that is shorter) passes between two reads.
+
+    max_interval : int (optional)
+        The largest number of nodes between two reads.
+
+    Attributes
+    ----------
+    interval : int
+        The current number of nodes between two reads.
+
+    polls : int
+        The number of times time_left() was read.
+    """
+    def __init__(self, time_left, threshold, poll_fraction=.25, max_interval=1024):
+        self.time_left = time_left
+        self.threshold = threshold
+        self.poll_fraction = poll_fraction
+        self.max_interval = max_interval
+        self.interval = 1
+        self.polls = 0
+        self._countdown = 1
+        self._last_poll = None
+
+    def expired(self):
+        """Count a node, and return True if the search must stop.
+
+        Only every `interval`-th call reads the time; the others just count
+        down, so this can be called at every node.
+        """
+        self._countdown -= 1
+        if self._countdown > 0:
+            return False
+        return self.poll()
+
+    def poll(self):
+        """ Read the time now, return True if the search must stop, and
+        choose the number of nodes until the next read.
+        """
+        self.polls += 1
+        slack = self.time_left() - self.threshold
+        if slack < 0:
+            self._countdown = 1
+            return True
+        now = timeit.default_timer()
+        if self._last_poll is not None:
+            rate = self.interval / max(1e-6, 1000 * (now - self._last_poll))
+            target = rate * self.poll_fraction * min(slack, self.threshold)
+            # at most double the interval at a time, so one fast burst of
+            # nodes does not stretch it past a slow stretch of the search
+            self.interval = max(1, min(int(target), 2 * self.interval, self.max_interval))
+        self._last_poll = now
+        self._countdown = self.interval
+        return False
+
+
+class NodeBudget(object):
+    """Stop the search after a fixed number of nodes, without reading the
+    time. A search bounded by a node budget instead of a timer visits the
+    same nodes and returns the same move every time it searches the same
+    position, whatever the load of the machine.
+
+    Parameters
+    ----------
+    budget : int or float
+        The number of nodes the search may visit; float("inf") never stops
+        the search.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes counted so far.
+    """
+    def __init__(self, budget):
+        self.budget = budget
+        self.nodes = 0
+
+    def expired(self):
+        """ Count a node, and return True if the budget is spent. """
+        self.nodes += 1
+        return self.nodes > self.budget
@@ -0,0 +1,217 @@
+"""This file contains an exact solver for Isolation endgames in which the
+players are partitioned, i.e., the sets of cells each player can still reach
+by knight moves no longer intersect. From then on neither player can block
+the other, so the game reduces to which player has the longer path through
+its own region: the player to move wins if and only if its longest path is
+strictly longer than the opponent's.
+
+The solver works on the bitmasks of `isolation.bitboard` for any `Board`.
+Longest paths are memoized on (cell, reachable region) pairs, where the
+region is the set of open cells still reachable from the cell, so positions
+reached by different move orders share their results.
+"""
+from isolation.bitboard import BitBoard, knight_moves, popcount
+
+
+def board_masks(game):
+    """Return the bitboard encoding of a game.
+
+    Parameters
+    ----------
+    game : isolation.Board
+        The game; a `BitBoard` is read directly, any other `Board` is
+        converted with `BitBoard.from_board`.
+
+    Returns
+    -------
+    (_Geometry, int, int, int)
+        The geometry tables of the board, the mask of open cells, and the
+        location masks of the active and inactive players (0 for a player
+        that has not moved yet).
+    """
+    if not isinstance(game, BitBoard):
+        game = BitBoard.from_board(game)
+    geometry = game._geometry
+    return (geometry, geometry.full & ~game._blocked,
+            game._player_bit(game._active_player),
+            game._player_bit(game._inactive_player))
+
+
+def reachable(cells, open_cells, geometry):
+    """Return the mask of open cells reachable by any sequence of knight
+    moves through open cells from the cells in `cells` (which are not
+    included unless reached again).
+    """
+    region = 0
+    frontier = knight_moves(cells, geometry) & open_cells
+    while frontier:
+        region |= frontier
+        frontier = knight_moves(frontier, geometry) & open_cells & ~region
+    return region
+
+
+def path_bound(cell, region, geometry):
+    """Return an upper bound on the length of a knight path from a cell
+    through a region. Knight moves alternate between light and dark cells,
+    so a path can use at most one more cell of the other color than of the
+    color of its start.
+    """
+    if cell & geometry.light:
+        same = popcount(region & geometry.light)
+    else:
+        same = popcount(region & ~geometry.light)
+    return min(2 * (popcount(region) - same), 2 * same + 1)
+
+
+def is_partitioned(game):
+    """Test whether the players of a game can no longer interact.
+
+    Returns
+    -------
+    bool
+        True if both players have moved and the regions they can reach do
+        not intersect, False otherwise.
+    """
+    geometry, open_cells, active, inactive = board_masks(game)
+    if not active or not inactive:
+        return False
+    return not (reachable(active, open_cells, geometry) &
+                reachable(inactive, open_cells, geometry))
+
+
+class LongestPathSolver(object):
+    """Memoized longest knight path search for partitioned endgames.
+
+    Parameters
+    ----------
+    check : callable (optional)
+        Called with no arguments every `check_interval` nodes; it may raise
+        an exception (e.g., `game_agent.SearchTimeout`) to abort the solve.
+
+    check_interval : int (optional)
+        The number of nodes between calls to `check`.
+
+    max_entries : int (optional)
+        The memo is cleared when it grows beyond this many entries.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of (cell, region) pairs expanded since the solver was
+        created.
+    """
+    def __init__(self, check=None, check_interval=1024, max_entries=2**18):
+        self.check = check
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self.memo = {}
+        self.nodes = 0
+        self._geometry = None
+
+    def longest(self, cell, open_cells, geometry, target=None):
+        """Return the number of moves in the longest path from a cell.
+
+        Parameters
+        ----------
+        cell : int
+            The location mask of the moving player.
+
+        open_cells : int
+            The mask of open cells the path may visit.
+
+        geometry : _Geometry
+            The geometry tables of the board.
+
+        target : int (optional)
+            If given, the search stops as soon as it finds a path of at least
+            this length, and returns that length instead of the longest.
+
+        Returns
+        -------
+        int
+            The length of the longest path of knight moves through open
+            cells starting at `cell`, or of a path at least `target` long.
+        """
+        if len(self.memo) > self.max_entries or geometry is not self._geometry:
+            # memo keys are only meaningful for one board size
+            self.memo.clear()
+            self._geometry = geometry
+        if target is None:
+            target = popcount(open_cells)
+        return self._longest(cell, reachable(cell, open_cells, geometry), geometry, target)
+
+    def _longest(self, cell, region, geometry, target):
+        # The memo holds (length, exact): a search stopped early by its
+        # target only proves a lower bound
+        key = (cell, region)
+        entry = self.memo.get(key)
+        if entry is not None and (entry[1] or entry[0] >= target):
+            return entry[0]
+        self.nodes += 1
+        if self.check is not None and not self.nodes % self.check_interval:
+            self.check()
+
+        bound = path_bound(cell, region, geometry)
+        length = 0
+        for move in self._ordered_moves(cell, region, geometry):
+            if length >= bound or length >= target:
+                break
+            rest = region & ~move
+            length = max(length, 1 + self._longest(
+                move, reachable(move, rest, geometry), geometry, target - 1))
+        self.memo[key] = (length, length < target or length >= bound)
+        return length
+
+    def _ordered_moves(self, cell, region, geometry):
+        """Return the location masks of the moves from a cell into a region,
+        those with the fewest onward moves first (Warnsdorff's rule), which
+        tends to find long paths early.
+        """
+        attacks = geometry.attacks
+        moves = []
+        mask = attacks[cell.bit_length() - 1] & region
+        while mask:
+            move = mask & -mask
+            mask ^= move
+            moves.append((popcount(attacks[move.bit_length() - 1] & region), move))
+        moves.sort()
+        return [move for _, move in moves]
+
+    def solve(self, game):
+        """Find the optimal move of the active player in a partitioned game.
+
+        The opponent's longest path is computed first (it only matters up to
+        the longest path the active player could possibly have). If the
+        active player has a longer path it wins, and the search stops at the
+        first move that starts one; otherwise it loses against best play,
+        and the move starting its longest path is returned.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            A game for which `is_partitioned` is True.
+
+        Returns
+        -------
+        ((int, int), int, int)
+            The chosen move ((-1, -1) if the active player has no moves), the
+            length of the path it starts, and the length of the inactive
+            player's longest path (capped at the longest path the active
+            player could have). The active player wins if and only if its
+            path is strictly longer.
+        """
+        geometry, open_cells, active, inactive = board_masks(game)
+        region = reachable(active, open_cells, geometry)
+        bound = path_bound(active, region, geometry)
+        opponent_length = self.longest(inactive, open_cells, geometry, bound)
+
+        best_move, length = (-1, -1), 0
+        for move in self._ordered_moves(active, region, geometry):
+            if length > opponent_length:
+                break
+            move_length = 1 + self.longest(move, region & ~move, geometry,
+                                           opponent_length)
+            if move_length > length:
+                best_move = geometry.coords[move.bit_length() - 1]
+                length = move_length
+        return best_move, length, opponent_length
@@ -0,0 +1,78 @@
+"""This file contains a memoizing wrapper for heuristic score functions.
+
+The score functions (e.g., `custom_score` or `sample_players.improved_score`)
+are pure functions of the position and the player, but search evaluates the
+same leaves again in every iterative deepening pass and through
+transpositions. `EvaluationCache` remembers the most recently used scores,
+keyed on the Zobrist hash of the board (see `isolation.Board.hash`) and the
+player, and has the same signature as the function it wraps, so it can be
+passed as the `score_fn` of any player.
+"""
+from collections import OrderedDict
+
+
+class EvaluationCache(object):
+    """Least recently used cache of the scores of a heuristic.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The heuristic, called as score_fn(game, player).
+
+    size : int (optional)
+        The maximum number of scores kept; the least recently used score is
+        evicted to make room for a new one.
+
+    Attributes
+    ----------
+    hits : int
+        The number of calls answered from the cache.
+
+    misses : int
+        The number of calls that evaluated the heuristic.
+
+    batch : callable
+        The batch form of the heuristic (see `sample_players.mobility_batch`),
+        only if it has one. Scoring the children of a node in one batch is
+        cheaper than probing the cache for each of them, so batch scores are
+        neither cached nor counted.
+    """
+    def __init__(self, score_fn, size=2**16):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.score_fn = score_fn
+        self.size = size
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        batch = getattr(score_fn, "batch", None)
+        if batch is not None:
+            self.batch = batch
+
+    def __call__(self, game, player):
+        key = (game.hash(), player)
+        scores = self.scores
+        score = scores.get(key)
+        if score is not None:
+            scores.move_to_end(key)
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = scores[key] = self.score_fn(game, player)
+        if len(scores) > self.size:
+            scores.popitem(last=False)
+        return score
+
+    def __len__(self):
+        return len(self.scores)
+
+    def hit_rate(self):
+        """ The fraction of calls answered from the cache. """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.
+
+    def clear(self):
+        """ Forget every score and reset the counters. """
+        self.scores.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,151 @@
+"""This file contains precomputed geometric features of the board cells for
+the heuristic score functions.
+
+A feature is a number that only depends on a cell and the size of the board,
+such as its distance from the center or its number of knight moves on an
+empty board. `get_features(width, height)` computes every feature once for
+each board size, so score functions read them with a table lookup instead of
+repeating the arithmetic at every leaf. `feature_score()` builds score
+functions that combine the features of the cells of both players with their
+mobility, using table lookups only.
+"""
+from functools import lru_cache
+
+from isolation.isolation import get_knight_degrees
+
+# the names of the features of `CellFeatures`, i.e., the keys of the
+# weights accepted by `feature_score()`
+FEATURE_NAMES = ("center", "degree", "edge", "corner")
+
+
+class CellFeatures(object):
+    """Geometric features of every cell index (row + column * height) of a
+    board of the given size.
+
+    Attributes
+    ----------
+    center : tuple<float>
+        The square of the distance from the center of the board, as scored
+        by `sample_players.center_score`.
+
+    degree : tuple<int>
+        The number of knight moves from the cell on an empty board.
+
+    edge : tuple<int>
+        2 for the cells on the border of the board, 1 for the cells next to
+        them and 0 for the others, i.e., how close the edges that cut the
+        knight moves of the cell are.
+
+    corner : tuple<int>
+        1 for the cells near two edges at once (the 2x2 squares in the
+        corners of the board), 0 for the others.
+    """
+    def __init__(self, width, height):
+        w, h = width / 2., height / 2.
+        cells = [(idx % height, idx // height) for idx in range(width * height)]
+        margins = [(min(y, height - 1 - y), min(x, width - 1 - x)) for y, x in cells]
+        self.center = tuple(float((h - y)**2 + (w - x)**2) for y, x in cells)
+        self.degree = get_knight_degrees(width, height)
+        self.edge = tuple(max(0, 2 - min(row, col)) for row, col in margins)
+        self.corner = tuple(int(row < 2 and col < 2) for row, col in margins)
+
+
+@lru_cache(maxsize=None)
+def get_features(width, height):
+    """Return the shared `CellFeatures` for a board of the given size,
+    building them on first use.
+    """
+    return CellFeatures(width, height)
+
+
+def feature_score(own_moves=1., opp_moves=-1., own=None, opp=None):
+    """Build a heuristic that adds weighted mobility and cell features of
+    both players:
+
+        own_moves * mobility(player) + opp_moves * mobility(opponent)
+            + sum(own[name] * feature[name][cell of player])
+            + sum(opp[name] * feature[name][cell of opponent])
+
+    The weighted sums are tabulated for each board size on first use, so a
+    score is four table lookups. The default weights give
+    `sample_players.improved_score`.
+
+    Parameters
+    ----------
+    own_moves, opp_moves : float (optional)
+        The weights of the number of legal moves of the player and of its
+        opponent.
+
+    own, opp : dict (optional)
+        The weights of the features of the cell of the player and of the
+        cell of its opponent, keyed by names from `FEATURE_NAMES`. A player
+        who has not moved yet has no cell features.
+
+    Returns
+    -------
+    callable
+        A score function, called as score(game, player), with a `batch`
+        form (see `sample_players.mobility_batch`).
+    """
+    own = dict(own or {})
+    opp = dict(opp or {})
+    for name in list(own) + list(opp):
+        if name not in FEATURE_NAMES:
+            raise ValueError("unknown feature: {}".format(name))
+
+    @lru_cache(maxsize=None)
+    def get_tables(width, height):
+        features = get_features(width, height)
+        cells = range(width * height)
+        moves = range(width * height + 1)
+        return (tuple(float(own_moves * count) for count in moves),
+                tuple(float(opp_moves * count) for count in moves),
+                tuple(sum(weight * getattr(features, name)[idx]
+                          for name, weight in own.items()) for idx in cells),
+                tuple(sum(weight * getattr(features, name)[idx]
+                          for name, weight in opp.items()) for idx in cells))
+
+    def score(game, player):
+        opponent = game.get_opponent(player)
+        own_count, opp_count = game.mobility(player), game.mobility(opponent)
+        # the game is over when the active player has no moves
+        if player == game.active_player:
+            if not own_count:
+                return float("-inf")
+        elif not opp_count:
+            return float("inf")
+
+        own_mobility, opp_mobility, own_cells, opp_cells = get_tables(game.width, game.height)
+        value = own_mobility[own_count] + opp_mobility[opp_count]
+        loc = game.get_player_location(player)
+        if loc is not None:
+            value += own_cells[loc[0] + loc[1] * game.height]
+        loc = game.get_player_location(opponent)
+        if loc is not None:
+            value += opp_cells[loc[0] + loc[1] * game.height]
+        return value
+
+    def batch(game, player, moves):
+        own_mobility, opp_mobility, own_cells, opp_cells = get_tables(game.width, game.height)
+        height = game.height
+        mover = player == game.active_player
+        # the cell of the waiting player is the same in every child
+        loc = game.get_player_location(game.inactive_player)
+        waiting_cells = opp_cells if mover else own_cells
+        waiting_value = 0. if loc is None else waiting_cells[loc[0] + loc[1] * height]
+        scores = []
+        for (row, col), (mover_moves, waiting_moves) in zip(moves, game.move_mobilities(moves)):
+            if not waiting_moves:
+                scores.append(float("inf") if mover else float("-inf"))
+            elif mover:
+                scores.append(own_mobility[mover_moves] + opp_mobility[waiting_moves] +
+                              own_cells[row + col * height] + waiting_value)
+            else:
+                # add the cell terms in the order of score(), own cell first,
+                # so rounding gives the same float
+                scores.append(own_mobility[waiting_moves] + opp_mobility[mover_moves] +
+                              waiting_value + opp_cells[row + col * height])
+        return scores
+
+    score.batch = batch
+    return score
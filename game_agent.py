@@ -2,7 +2,25 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import math
+import multiprocessing
+import os
 import random
+import timeit
+
+from clock import NodeBudget, SearchClock
+from endgame import LongestPathSolver, board_masks, is_partitioned
+from features import get_features
+from move_ordering import MoveOrdering
+from opening_book import OpeningBook
+from sample_players import improved_score, open_move_score
+from tablebase import Tablebase
+from transposition import (TranspositionTable, SharedTranspositionTable,
+                           EXACT, LOWER, UPPER)
+
+# Folded into transposition table keys when the searching player moves
+# second, since AlphaBetaPlayer scores are from the searching player's view
+SECOND_PLAYER_KEY = 0x9E3779B97F4A7C15
 
 
 class SearchTimeout(Exception):
@@ -10,6 +28,43 @@ class SearchTimeout(Exception):
     pass
 
 
+def reduction_table(start=3, scale=.5, max_depth=32, max_moves=8):
+    """Build a late move reduction table for `AlphaBetaPlayer`.
+
+    Parameters
+    ----------
+    start : int (optional)
+        The index (in search order) of the first move that may be reduced.
+
+    scale : float (optional)
+        Moves from `start` on are reduced by max(1, scale * ln(depth) *
+        ln(index + 1)) plies, rounded down, where depth is the remaining
+        depth of the node.
+
+    max_depth, max_moves : int (optional)
+        The size of the table; larger depths and indices use the last row
+        and column.
+
+    Returns
+    -------
+    list<list<int>>
+        table[depth][index] is the number of plies the move searched at
+        `index` of a node `depth` plies from the horizon is reduced by. A
+        child is never searched at a negative depth, so no move is reduced
+        by more than depth - 1 plies.
+    """
+    table = []
+    for depth in range(max_depth + 1):
+        row = []
+        for index in range(max_moves):
+            reduction = 0
+            if index >= start and depth >= 2:
+                reduction = max(1, int(scale * math.log(depth) * math.log(index + 1)))
+            row.append(min(reduction, max(0, depth - 1)))
+        table.append(row)
+    return table
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -42,11 +97,15 @@ def custom_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.mobility(player)
+    opp_moves = game.mobility(game.get_opponent(player))
     return float(own_moves - opp_moves)
 
 
+# custom_score is improved_score, so it has the same batch form
+custom_score.batch = improved_score.batch
+
+
 def custom_score_2(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -77,9 +136,8 @@ def custom_score_2(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    w, h = game.width / 2., game.height / 2.
     y, x = game.get_player_location(player)
-    return float((h - y)**2 + (w - x)**2)
+    return get_features(game.width, game.height).center[y + x * game.height]
 
 
 def custom_score_3(game, player):
@@ -112,7 +170,11 @@ def custom_score_3(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+    return float(game.mobility(player))
+
+
+# custom_score_3 is open_move_score, so it has the same batch form
+custom_score_3.batch = open_move_score.batch
 
 
 def print_move(move):
@@ -139,12 +201,70 @@ class IsolationPlayer:
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    in_place : bool (optional)
+        If True, search applies and reverts moves on the game board with
+        `push_move()`/`pop_move()` instead of copying it with
+        `forecast_move()` at every node.
+
+    node_budget : int or float (optional)
+        If given, get_move() ignores the timer and stops the search after
+        this many timer checks, i.e., searched nodes not counting the leaves
+        scored without search (see `clock.NodeBudget`). The same position
+        then always gets the same search and the same move; float("inf")
+        searches to the fixed depth without any limit. Keep the budget small
+        enough for the time limit of the game, since the timer is not
+        checked.
+
+    Attributes
+    ----------
+    clock : clock.SearchClock or clock.NodeBudget
+        Polls `time_left` for the search; a new clock is started whenever
+        `time_left` is assigned, and get_move() replaces it with a
+        `NodeBudget` if the player has a node budget.
+
+    stats : search_stats.SearchStats or None
+        The search statistics recorded for each move, if enabled with
+        `search_stats.SearchStats.attach`.
     """
-    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.):
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, node_budget=None):
         self.search_depth = search_depth
         self.score = score_fn
-        self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.time_left = None
+        self.in_place = in_place
+        self.node_budget = node_budget
+        self.stats = None
+
+    @property
+    def time_left(self):
+        return self._time_left
+
+    @time_left.setter
+    def time_left(self, time_left):
+        self._time_left = time_left
+        self.clock = None if time_left is None else SearchClock(time_left, self.TIMER_THRESHOLD)
+
+    def start_clock(self, time_left):
+        """ Set `time_left` for a call to get_move(), and bound the search
+        by the node budget instead, if the player has one.
+        """
+        self.time_left = time_left
+        if self.node_budget is not None:
+            self.clock = NodeBudget(self.node_budget)
+
+    def child(self, game, move):
+        """ Return the game with `move` applied, in-place or as a copy. """
+        if self.in_place:
+            return game.push_move(move)
+        return game.forecast_move(move)
+
+    def undo_search(self, game, move_count):
+        """ Revert in-place moves left on the board by an aborted search. """
+        if self.in_place:
+            while game.move_count > move_count:
+                game.pop_move()
 
 
 class MinimaxPlayer(IsolationPlayer):
@@ -181,7 +301,8 @@ class MinimaxPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        self.time_left = time_left
+        self.start_clock(time_left)
+        move_count = game.move_count
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -193,7 +314,7 @@ class MinimaxPlayer(IsolationPlayer):
             return self.minimax(game, self.search_depth)
 
         except SearchTimeout:
-            pass  # Handle any actions required after timeout as needed
+            self.undo_search(game, move_count)
 
         # Return the best move from the last completed search iteration
         return best_move
@@ -237,14 +358,16 @@ class MinimaxPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.clock.expired():
             raise SearchTimeout()
         
         best_score = float("-inf")
         best_move = (-1,-1)
         if depth > 0:
             for move in game.get_legal_moves():
-                v = self.min_value(game.forecast_move(move), depth - 1)
+                v = self.min_value(self.child(game, move), depth - 1)
+                if self.in_place:
+                    game.pop_move()
                 if v > best_score:
                     best_score = v
                     best_move = move
@@ -254,7 +377,7 @@ class MinimaxPlayer(IsolationPlayer):
         """ Return True if the game is over for the active player
         and False otherwise.
         """
-        if game and len(game.get_legal_moves()) > 0:
+        if game and game.mobility() > 0:
             return False
         return True
         
@@ -264,7 +387,7 @@ class MinimaxPlayer(IsolationPlayer):
         nodes.
         """
         
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.clock.expired():
             raise SearchTimeout()
         
         if self.terminal_test(game):
@@ -279,7 +402,9 @@ class MinimaxPlayer(IsolationPlayer):
         v = float("inf")
         for move in game.get_legal_moves():
             #print ("    depth ", depth, "player", game.active_player, "move", move)
-            v = min(v, self.max_value(game.forecast_move(move), depth - 1))
+            v = min(v, self.max_value(self.child(game, move), depth - 1))
+            if self.in_place:
+                game.pop_move()
         return v
     
     def max_value(self, game, depth):
@@ -288,7 +413,7 @@ class MinimaxPlayer(IsolationPlayer):
         nodes.
         """
         
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.clock.expired():
             raise SearchTimeout()
         
         if self.terminal_test(game):
@@ -302,7 +427,9 @@ class MinimaxPlayer(IsolationPlayer):
         #print ("   max depth", depth)
         v = float("-inf")
         for move in game.get_legal_moves():
-            v = max(v, self.min_value(game.forecast_move(move), depth - 1))            
+            v = max(v, self.min_value(self.child(game, move), depth - 1))
+            if self.in_place:
+                game.pop_move()
         return v
 
 
@@ -310,10 +437,245 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    tt_size : int (optional)
+        The number of entries in the transposition table kept across
+        iterative deepening passes and calls to get_move(), or 0 to search
+        without a transposition table.
+
+    move_ordering : iterable (optional)
+        The `move_ordering.MoveOrdering` stages used to sort the moves at
+        each node, e.g. ("hash", "killer", "history"); by default moves are
+        searched in the order returned by the board.
+
+    search : str (optional)
+        The search algorithm run at each iterative deepening pass: "alphabeta"
+        for full-window minimax search with alpha-beta pruning, or "pvs" for
+        negamax principal variation search, which scouts every move after
+        the first with a null window and only re-searches the moves that
+        fail high, or "mtdf" for MTD(f), which converges on the minimax value
+        with a sequence of null-window alpha-beta searches starting from the
+        score of the previous pass (see `mtdf`). MTD(f) relies on the
+        transposition table to avoid searching the same nodes again in each
+        null-window search, so it uses a table of 2**16 entries if tt_size
+        is 0, and it ignores the aspiration window.
+
+    aspiration_window : float (optional)
+        If positive, each iterative deepening pass after the first searches
+        the window (score - aspiration_window, score + aspiration_window)
+        around the score of the previous pass, and re-searches with a wider
+        window if the score falls outside it; 0 searches every pass with the
+        full window.
+
+    aspiration_growth : float (optional)
+        The factor (greater than 1) the aspiration window grows by after each
+        failed search.
+
+    ponder : bool (optional)
+        If True, the player searches on the opponent's time: when notified
+        (by `Board.play`) that its own move was played, it predicts the
+        opponent's reply and searches the resulting position in a helper
+        process (at a lower priority, so an opponent running in this process,
+        e.g., in tournament.py, keeps the CPU), filling a shared
+        transposition table (of tt_size entries, 2**16 by default). If the
+        prediction is right, the next get_move() continues that search
+        instead of starting over. Call `close()` to stop the helper and free
+        the table.
+
+    ponder_time : float (optional)
+        The maximum number of milliseconds to ponder after each move.
+
+    workers : int (optional)
+        The number of processes searching each move. With more than one, the
+        player runs a Lazy SMP search: workers - 1 helper processes search
+        the same root with staggered depths, sharing a transposition table
+        (of tt_size entries, 2**16 by default) in shared memory, while the
+        main process runs the usual iterative deepening and returns its own
+        best move. Call `close()` to stop the helpers and free the table.
+        At most one process per CPU core is used (helpers on a shared core
+        would take time from the main search and make it miss its deadline).
+
+    endgame : bool (optional)
+        If True, get_move() checks whether the players are partitioned (see
+        `endgame.is_partitioned`) and, if so, plays the provably optimal move
+        found by `endgame.LongestPathSolver` instead of searching. The solver
+        may use half of the remaining time; if it does not finish, the player
+        falls back to its search.
+
+    opening_book : str or opening_book.OpeningBook (optional)
+        A book (or the path of a book file) built with
+        `opening_book.build_book`; get_move() plays the book move without
+        searching in the positions the book covers.
+
+    tablebase : str or tablebase.Tablebase (optional)
+        Endgame tables (or the directory of the tables) generated with
+        `tablebase.generate`. The search probes them at interior and leaf
+        nodes, and scores the positions they cover as won or lost (from the
+        searching player's view) without searching further.
+
+    time_manager : time_manager.TimeManager (optional)
+        If given, get_move() plays a forced move without searching, and
+        iterative deepening stops before a pass that the time manager
+        predicts cannot finish in time, or once the best move is stable or
+        the game is decided. By default the search deepens until the timer
+        expires.
+
+    max_depth : int (optional)
+        If given, iterative deepening stops after the pass of this depth.
+        With `node_budget=float("inf")`, the player searches every position
+        to exactly this depth regardless of the timer.
+
+    extensions : iterable (optional)
+        The kinds of moves searched one ply deeper than their siblings (so
+        they do not use up the depth of the pass): "forced" extends the only
+        legal move of a position, and "singular" extends the only move after
+        which the mover still has a legal move (every other move loses at
+        the mover's next turn). See `extended_move`.
+
+    max_extension : int (optional)
+        The maximum number of extended plies along any line of the search,
+        which keeps long forced sequences from deepening a pass without end.
+
+    reductions : list<list<int>> (optional)
+        A late move reduction table (see `reduction_table`), or None to
+        search every move to the full depth. Moves late in the search order
+        of a node are first searched with a null window to the depth reduced
+        by table[depth][index] plies, and only searched again to the full
+        depth if they beat alpha.
+
+    See `IsolationPlayer` for the other parameters.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes (including scored leaves) visited by the current
+        call to get_move().
+
+    depth_nodes : list<(int, int)>
+        The (depth, cumulative nodes) reached at the end of each completed
+        iterative deepening pass of the current call to get_move().
+
+    depth_researches : list<(int, int, int)>
+        The (depth, fail-low re-searches, fail-high re-searches) of each
+        completed iterative deepening pass of the current call to get_move().
+        For MTD(f), the counts are of the null-window searches that failed
+        low and high.
+
+    root_score : float
+        The score of the root position found by the last search.
+
+    ponder_hits : int
+        The number of opponent moves that matched the pondered reply.
+
+    ponder_misses : int
+        The number of opponent moves that did not match the pondered reply.
+
+    worker_nodes : list<int>
+        The number of nodes visited by each worker (the main process first)
+        during the last Lazy SMP search, or None for a helper that did not
+        report in time.
+
+    worker_depths : list<int>
+        The depth of the last pass completed by each worker during the last
+        Lazy SMP search, or None for a helper that did not report in time.
+
+    endgame_result : (int, int) or None
+        The lengths of the longest paths of the player and of its opponent
+        if the last call to get_move() solved a partitioned endgame, or None.
+
+    wasted_nodes : int
+        The number of nodes visited by the iterative deepening pass aborted
+        by the timer during the current call to get_move() (0 if the search
+        stopped between passes).
+
+    reduced_moves : int
+        The number of moves searched to a reduced depth during the current
+        call to get_move().
+
+    reduction_researches : int
+        The number of reduced moves that beat alpha and were searched again
+        to the full depth during the current call to get_move().
     """
     
     searching_player = None
 
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, tt_size=0, move_ordering=(), search="alphabeta",
+                 aspiration_window=0., aspiration_growth=4., ponder=False,
+                 ponder_time=1000., workers=1, endgame=True, opening_book=None,
+                 tablebase=None, time_manager=None, node_budget=None,
+                 max_depth=None, extensions=(), max_extension=4,
+                 reductions=None):
+        IsolationPlayer.__init__(self, search_depth, score_fn, timeout, in_place,
+                                 node_budget)
+        if search not in ("alphabeta", "pvs", "mtdf"):
+            raise ValueError("Unknown search algorithm: {}".format(search))
+        if aspiration_growth <= 1:
+            raise ValueError("aspiration_growth must be greater than 1")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        workers = min(workers, os.cpu_count() or 1)
+        if node_budget == float("inf") and max_depth is None:
+            raise ValueError("an unlimited node_budget needs a max_depth")
+        for extension in extensions:
+            if extension not in ("forced", "singular"):
+                raise ValueError("Unknown extension: {}".format(extension))
+        self.search = search
+        if search == "mtdf":
+            tt_size = tt_size or 2**16
+        if workers > 1 or ponder:
+            self.tt = SharedTranspositionTable(tt_size or 2**16)
+        else:
+            self.tt = TranspositionTable(tt_size) if tt_size else None
+        self.tt_salt = 0
+        self.ordering = MoveOrdering(move_ordering) if move_ordering else None
+        self.pv_move = None
+        self.nodes = 0
+        self.depth_nodes = []
+        self.aspiration_window = aspiration_window
+        self.aspiration_growth = aspiration_growth
+        self.depth_researches = []
+        self.root_score = None
+        self.ponder = ponder
+        self.ponder_time = ponder_time
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.ponder_move = None
+        self.ponder_result = None
+        self._ponder_helper = None
+        self._ponder_job = None
+        self.workers = workers
+        self.worker_nodes = []
+        self.worker_depths = []
+        self._helper_settings = dict(
+            search_depth=search_depth, score_fn=score_fn, timeout=timeout,
+            in_place=in_place, move_ordering=move_ordering, search=search,
+            aspiration_window=aspiration_window,
+            aspiration_growth=aspiration_growth, extensions=extensions,
+            max_extension=max_extension, reductions=reductions)
+        self._helpers = []
+        self._helper_stop = None
+        self._job = 0
+        self.endgame_solver = LongestPathSolver() if endgame else None
+        self.endgame_result = None
+        if isinstance(opening_book, str):
+            opening_book = OpeningBook(opening_book)
+        self.book = opening_book
+        if isinstance(tablebase, str):
+            tablebase = Tablebase(tablebase)
+        self.tablebase = tablebase
+        self.time_manager = time_manager
+        self.wasted_nodes = 0
+        self.max_depth = max_depth
+        self.extensions = tuple(extensions)
+        self.max_extension = max_extension
+        self._extension = 0
+        self.reductions = reductions
+        self.reduced_moves = 0
+        self.reduction_researches = 0
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -344,28 +706,403 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        self.time_left = time_left
-        
+        self.start_clock(time_left)
+        self.stop_pondering(self.helper_wait())
+        self.nodes = 0
+        self.depth_nodes = []
+        self.reduced_moves = 0
+        self.reduction_researches = 0
+
+        if self.book is not None:
+            move = self.book.lookup(game)
+            if move is not None:
+                return move
+
+        if self.time_manager is not None:
+            self.start_clock(self.time_manager.start(game, time_left,
+                                                     self.TIMER_THRESHOLD))
+            legal_moves = game.get_legal_moves()
+            if len(legal_moves) == 1:
+                self.time_manager.stop("forced")
+                return legal_moves[0]
+
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
         best_move = (-1,-1)
+        depth = 1
+
+        result, self.ponder_result = self.ponder_result, None
+        if result is not None and result[0] == game.hash():
+            # Ponder hit: keep deepening the search made on the opponent's time
+            _, depth, best_move, self.root_score = result
+            self.pv_move = best_move
+            self.nodes = 0
+            self.depth_nodes = []
+            self.depth_researches = []
+            depth += 1
+        else:
+            self.new_search()
+
+        self.endgame_result = None
+        if self.endgame_solver is not None and is_partitioned(game):
+            move = self.solve_endgame(game)
+            if move is not None:
+                return move
+
+        if self.workers > 1:
+            return self.lazy_smp(game, best_move, depth, self.time_manager)
+        return self.iterative_deepening(game, best_move, depth, self.time_manager)
+
+    def new_search(self):
+        """ Reset the per-move search state before a new search. """
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search()
+        self.pv_move = None
+        self.nodes = 0
+        self.depth_nodes = []
+        self.depth_researches = []
+        self.root_score = None
+        self.wasted_nodes = 0
+        self.reduced_moves = 0
+        self.reduction_researches = 0
+
+    def iterative_deepening(self, game, best_move=(-1,-1), depth=1,
+                            time_manager=None):
+        """Search the game with increasing depth limits until the timer
+        expires, the time manager (if any) stops the search, or the pass of
+        `max_depth` (if set) completes.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+
+        best_move : (int, int) (optional)
+            The move to return if no pass completes.
+
+        depth : int (optional)
+            The depth limit of the first pass.
+
+        time_manager : time_manager.TimeManager (optional)
+            Asked after each completed pass whether to start the next one.
+
+        Returns
+        -------
+        (int, int)
+            The best move from the last completed search iteration
+        """
+        move_count = game.move_count
+        self.wasted_nodes = 0
 
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            depth = 1
-            while True:
-                best_move = self.alphabeta(game, depth)
+            while self.max_depth is None or depth <= self.max_depth:
+                best_move = self.aspiration_search(game, depth)
+                self.pv_move = best_move
+                self.depth_nodes.append((depth, self.nodes))
+                if time_manager is not None and time_manager.pass_completed(
+                        depth, self.nodes, best_move, self.root_score):
+                    break
                 depth += 1
 
         except SearchTimeout:
-            pass  # Handle any actions required after timeout as needed
+            self.undo_search(game, move_count)
+            self.wasted_nodes = self.nodes - (self.depth_nodes[-1][1] if self.depth_nodes else 0)
 
         # Return the best move from the last completed search iteration
         return best_move
     
         
 
+    def solve_endgame(self, game):
+        """Solve a partitioned game exactly, using at most half of the
+        remaining time, or under a node budget at most half of the remaining
+        nodes. Sets `endgame_result` and `root_score` on success.
+
+        Returns
+        -------
+        (int, int) or None
+            The optimal move, or None if the solver ran out of time.
+        """
+        solver = self.endgame_solver
+        start_nodes = solver.nodes
+        if self.node_budget is not None:
+            # count solver nodes rather than time, so that whether the solve
+            # succeeds does not depend on the load of the machine
+            limit = (self.node_budget - self.clock.nodes) / 2
+
+            def check():
+                if solver.nodes - start_nodes > limit:
+                    raise SearchTimeout()
+        else:
+            deadline = self.time_left() / 2
+
+            def check():
+                if self.time_left() < deadline:
+                    raise SearchTimeout()
+
+        solver.check = check
+        try:
+            move, length, opponent_length = solver.solve(game)
+        except SearchTimeout:
+            return None
+        finally:
+            self.nodes += solver.nodes - start_nodes
+            if self.node_budget is not None:
+                # the search that follows a failed solve spends the rest
+                self.clock.nodes += solver.nodes - start_nodes
+        self.endgame_result = (length, opponent_length)
+        self.root_score = float("inf") if length > opponent_length else float("-inf")
+        return move
+
+    def lazy_smp(self, game, best_move=(-1,-1), depth=1, time_manager=None):
+        """Run `iterative_deepening` in this process while the helper
+        processes search the same position, then stop the helpers and
+        collect their node counts into `worker_nodes` and `worker_depths`.
+        The helpers only contribute through the shared transposition table;
+        the move returned is the main search's.
+
+        Returns
+        -------
+        (int, int)
+            The best move from the last completed search iteration
+        """
+        self.start_helpers()
+        self._job += 1
+        self._helper_stop.value = self._job
+        position = _detach_players(game)
+        for worker_id, (_, conn) in enumerate(self._helpers, 1):
+            # odd helpers start one ply deeper than the main search, so the
+            # workers spread over two depths and fill the table ahead of it
+            conn.send((self._job, position, self.tt.generation,
+                       1 + worker_id % 2, float("inf")))
+        try:
+            best_move = self.iterative_deepening(game, best_move, depth,
+                                                 time_manager)
+        finally:
+            self._helper_stop.value = 0
+
+        self.worker_nodes = [self.nodes]
+        self.worker_depths = [self.depth_nodes[-1][0] if self.depth_nodes else None]
+        # The reports are only statistics, so they may not delay the move
+        deadline = timeit.default_timer() + self.helper_wait()
+        for _, conn in self._helpers:
+            report = self.helper_report(conn, self._job, deadline)
+            nodes, depth = report[:2] if report is not None else (None, None)
+            self.worker_nodes.append(nodes)
+            self.worker_depths.append(depth)
+        return best_move
+
+    def helper_wait(self):
+        """ Return the number of seconds to wait for the reports of the
+        helpers in all: a quarter of the timer threshold, or of the time
+        left if that is shorter.
+        """
+        return max(0., min(self.TIMER_THRESHOLD, self.time_left())) / 4000
+
+    def helper_report(self, conn, job, deadline=None):
+        """Return the (nodes, depth, best move, score, position hash) report
+        of a helper for the job, or None if it does not arrive before the deadline (a
+        `timeit.default_timer()` value; None waits for it). Reports of
+        earlier jobs that arrived too late are discarded.
+        """
+        while True:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0., deadline - timeit.default_timer())
+            if not conn.poll(timeout):
+                return None
+            report = conn.recv()
+            if report[0] == job:
+                return report[1:]
+
+    def start_helper(self):
+        """ Start a helper search process (see `_search_helper`) and return
+        it with the main end of its pipe.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        if self._helper_stop is None:
+            self._helper_stop = context.RawValue("i", 0)
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_search_helper,
+            args=(child_conn, self._helper_stop, self.tt, self._helper_settings))
+        process.daemon = True
+        process.start()
+        child_conn.close()
+        return process, conn
+
+    def start_helpers(self):
+        """ Start the Lazy SMP helper processes, if they are not running. """
+        if self._helpers:
+            return
+        for _ in range(1, self.workers):
+            self._helpers.append(self.start_helper())
+
+    def close(self):
+        """ Stop the helper processes and release the shared table. """
+        if self._helper_stop is not None:
+            self._helper_stop.value = 0
+        helpers = self._helpers
+        if self._ponder_helper is not None:
+            helpers = helpers + [self._ponder_helper]
+        for process, conn in helpers:
+            conn.send(None)
+            process.join()
+            conn.close()
+        self._helpers = []
+        self._ponder_helper = None
+        self._ponder_job = None
+        if isinstance(self.tt, SharedTranspositionTable):
+            self.tt.close()
+            self.tt = None
+
+    def notify_move(self, game, move):
+        """Called by `Board.play` after each move with a copy of the updated
+        game. Starts pondering after the player's own moves, and stops it
+        (recording whether the prediction was right) after the opponent's.
+        """
+        if not self.ponder:
+            return
+        self.stop_pondering()
+        if game.inactive_player == self:
+            self.start_pondering(game)
+        elif self.ponder_move is not None:
+            if move == self.ponder_move:
+                self.ponder_hits += 1
+            else:
+                self.ponder_misses += 1
+            self.ponder_move = None
+
+    def start_pondering(self, game):
+        """Predict the opponent's reply in the game and search the resulting
+        position in the ponder helper process until `stop_pondering()` is
+        called or `ponder_time` runs out.
+        """
+        moves = game.get_legal_moves()
+        if not moves:
+            return
+        predicted = None
+        if self.tt is not None:
+            entry = self.tt.probe(game.hash() ^ self.tt_salt)
+            if entry is not None and entry[3] in moves:
+                predicted = entry[3]
+        if predicted is None:
+            predicted = min(moves, key=lambda m: self.score(game.forecast_move(m), self))
+        ponder_game = game.forecast_move(predicted)
+        if not ponder_game.get_legal_moves():
+            return
+
+        self.ponder_move = predicted
+        if self._ponder_helper is None:
+            self._ponder_helper = self.start_helper()
+        self.new_search()
+        self._job += 1
+        self._ponder_job = self._job
+        self._helper_stop.value = self._job
+        self._ponder_helper[1].send((self._job, _detach_players(ponder_game),
+                                     self.tt.generation, 1, self.ponder_time))
+
+    def stop_pondering(self, timeout=None):
+        """Stop the ponder search, if any, and keep its result for the next
+        get_move() if it reports within `timeout` seconds (None waits for
+        it; the helper notices the stop at its next node).
+        """
+        if self._ponder_job is None:
+            return
+        job, self._ponder_job = self._ponder_job, None
+        self._helper_stop.value = 0
+        deadline = None if timeout is None else timeit.default_timer() + timeout
+        report = self.helper_report(self._ponder_helper[1], job, deadline)
+        if report is not None and report[1] is not None:
+            _, depth, best_move, root_score, key = report
+            self.ponder_result = (key, depth, best_move, root_score)
+
+    def aspiration_search(self, game, depth):
+        """Run one iterative deepening pass to the given depth, searching an
+        aspiration window around the score of the previous pass (if enabled)
+        and widening it on the side the search failed until the score falls
+        inside. The re-search counts are recorded in `depth_researches`.
+
+        Returns
+        -------
+        (int, int)
+            The board coordinates of the best move found in the search.
+        """
+        if self.search == "mtdf":
+            return self.mtdf(game, depth)
+        delta = self.aspiration_window
+        score = self.root_score
+        if not delta or score is None or score in (float("-inf"), float("inf")):
+            best_move = self.alphabeta(game, depth)
+            self.depth_researches.append((depth, 0, 0))
+            return best_move
+
+        alpha, beta = score - delta, score + delta
+        fail_lows = fail_highs = 0
+        while True:
+            best_move = self.alphabeta(game, depth, alpha, beta)
+            delta *= self.aspiration_growth
+            if self.root_score <= alpha and alpha > float("-inf"):
+                fail_lows += 1
+                alpha = self.root_score - delta
+            elif self.root_score >= beta and beta < float("inf"):
+                fail_highs += 1
+                beta = self.root_score + delta
+            else:
+                break
+        self.depth_researches.append((depth, fail_lows, fail_highs))
+        return best_move
+
+    def mtdf(self, game, depth):
+        """Run one iterative deepening pass to the given depth with MTD(f).
+
+        Each null-window alpha-beta search around the guess g either fails
+        low, proving that g is an upper bound on the minimax value, or fails
+        high, proving that it is a lower bound; the result of each search is
+        the next guess, until the bounds meet. The first guess is the score
+        of the previous pass; the first pass has no guess and searches with
+        the full window. The number of searches is recorded in
+        `depth_researches`.
+
+        Returns
+        -------
+        (int, int)
+            The board coordinates of the best move found in the search.
+        """
+        guess = self.root_score
+        if guess is None:
+            best_move = self.alphabeta(game, depth)
+            self.depth_researches.append((depth, 0, 0))
+            return best_move
+
+        lower, upper = float("-inf"), float("inf")
+        best_move = None
+        fail_lows = fail_highs = 0
+        while lower < upper:
+            beta = guess if guess > lower else math.nextafter(lower, upper)
+            move = self.alphabeta(game, depth, math.nextafter(beta, lower), beta)
+            guess = self.root_score
+            if guess < beta:
+                upper = guess
+                fail_lows += 1
+            else:
+                # only a search that fails high proves the value of its move
+                lower = guess
+                best_move = move
+                fail_highs += 1
+        if best_move is None:
+            # every move loses: the value is -inf and any legal move will do
+            legal_moves = game.get_legal_moves()
+            best_move = legal_moves[0] if legal_moves else (-1, -1)
+        self.depth_researches.append((depth, fail_lows, fail_highs))
+        return best_move
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
@@ -414,15 +1151,92 @@ class AlphaBetaPlayer(IsolationPlayer):
         
         
         
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.clock.expired():
             raise SearchTimeout()
         
         self.searching_player = game.active_player
+        self.tt_salt = SECOND_PLAYER_KEY if game.move_count % 2 else 0
+        self._extension = 0
+        if self.search == "pvs":
+            return self.pvs_score(game, depth - 1, alpha, beta, 1, True)
         return self.alphabeta_score(game, depth - 1, alpha, beta, True, True)
             
         
-    def alphabeta_score(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizingPlayer=True, isRoot=False):
-        if self.time_left() < self.TIMER_THRESHOLD:
+    def extended_move(self, game, moves):
+        """Return the move of a position to search one ply deeper than its
+        siblings, if any, according to `extensions`.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The position.
+
+        moves : list<(int, int)>
+            The legal moves of the active player.
+
+        Returns
+        -------
+        (int, int) or None
+            The only legal move ("forced"), or the only move after which the
+            active player still has a legal move of its own ("singular"), or
+            None.
+        """
+        if len(moves) == 1:
+            return moves[0] if "forced" in self.extensions else None
+        if "singular" not in self.extensions:
+            return None
+        mover = game.active_player
+        singular = None
+        for move in moves:
+            with game.pushed_move(move):
+                alive = game.mobility(mover) > 0
+            if alive:
+                if singular is not None:
+                    return None
+                singular = move
+        return singular
+
+    def evaluate(self, game):
+        """ Score a leaf for the searching player, from the tablebase if it
+        covers the position and with `self.score()` otherwise.
+        """
+        if self.tablebase is not None:
+            value = self.probe_tablebase(game)
+            if value is not None:
+                return value
+        return self.score(game, self.searching_player)
+
+    def leaf_scores(self, game, moves):
+        """ Return the scores of the children of a node at depth 0 for the
+        searching player, all at once from the `batch` attribute of
+        `self.score` (see `sample_players.mobility_batch`), or None if the
+        score function has no batch form or the tablebase must be probed.
+        """
+        batch = getattr(self.score, "batch", None)
+        if batch is None or self.tablebase is not None:
+            return None
+        return batch(game, self.searching_player, moves)
+
+    def probe_tablebase(self, game):
+        """ Return +inf or -inf if the tablebase proves the game won or lost
+        for the searching player, or None if it does not cover the game.
+        """
+        entry = self.tablebase.probe(game)
+        if entry is None:
+            return None
+        if entry[0] == (game.active_player == self.searching_player):
+            return float("inf")
+        return float("-inf")
+
+    def alphabeta_score(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizingPlayer=True, isRoot=False, ply=0):
+        """ Return the alpha-beta value of the game to the searching player
+        (or the best move if isRoot is True), scoring the children of the
+        nodes at depth 0. Results are cached in the transposition table, if
+        the player has one. `ply` is the distance of the game from the root,
+        which keys the killer moves (reduced and extended moves change the
+        depth by more or less than one per ply).
+        """
+        if self.clock.expired():
             raise SearchTimeout()
         
         #print("isRoot", isRoot)
@@ -430,67 +1244,576 @@ class AlphaBetaPlayer(IsolationPlayer):
         # if depth == 0 or self.terminal_test(game):
         #     return self.score(game, game.inactive_player)
         #=======================================================================
+
+        self.nodes += 1
+        if self.tablebase is not None and not isRoot:
+            value = self.probe_tablebase(game)
+            if value is not None:
+                return value
+
+        hash_move = None
+        tt = self.tt
+        if tt is not None:
+            key = game.hash() ^ self.tt_salt
+            entry = tt.probe(key)
+            if entry is not None:
+                hash_move = entry[3]
+            if entry is not None and entry[0] >= depth and not isRoot:
+                _, tt_score, tt_flag, _ = entry
+                if tt_flag == EXACT:
+                    return tt_score
+                if tt_flag == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+            alpha_orig, beta_orig = alpha, beta
         
+        moves = game.get_legal_moves()
+        ordering = self.ordering
+        if ordering is not None:
+            if isRoot and hash_move is None:
+                hash_move = self.pv_move
+            moves = ordering.order(moves, ply, hash_move)
+        extended = None
+        if self.extensions and self._extension < self.max_extension:
+            extended = self.extended_move(game, moves)
+        reductions = None
+        if self.reductions is not None:
+            reductions = self.reductions[min(depth, len(self.reductions) - 1)]
+        leaf_scores = self.leaf_scores(game, moves) if depth == 0 else None
+
         #print('depth', depth)
+        best_move = (-1,-1)
         if maximizingPlayer:
             
             v = float("-inf")
-            best_move = (-1,-1)
-            for move in game.get_legal_moves():
-                new_board = game.forecast_move(move)
+            for i, move in enumerate(moves):
+                new_board = None
+                if leaf_scores is None or move == extended:
+                    new_board = self.child(game, move)
                 
-                if depth == 0:
-                    current_v = self.score(new_board, self.searching_player)
+                if new_board is None:
+                    self.nodes += 1
+                    current_v = leaf_scores[i]
+                elif move == extended:
+                    self._extension += 1
+                    current_v = self.alphabeta_score(new_board, depth, alpha, beta, False, ply=ply + 1)
+                    self._extension -= 1
+                elif depth == 0:
+                    self.nodes += 1
+                    current_v = self.evaluate(new_board)
                     #print("max leafnode move", move[0], move[1], "value", v)
                 else:
-                    current_v = self.alphabeta_score(game.forecast_move(move), depth - 1, alpha, beta, False, False)
-                    
+                    reduction = reductions[min(i, len(reductions) - 1)] if reductions else 0
+                    if reduction:
+                        # a late move must beat alpha at the reduced depth to
+                        # be searched to the full depth
+                        self.reduced_moves += 1
+                        current_v = self.alphabeta_score(new_board, depth - 1 - reduction, alpha,
+                                                         math.nextafter(alpha, beta), False,
+                                                         ply=ply + 1)
+                    if not reduction or current_v > alpha:
+                        if reduction:
+                            self.reduction_researches += 1
+                        current_v = self.alphabeta_score(new_board, depth - 1, alpha, beta, False, ply=ply + 1)
+                if self.in_place and new_board is not None:
+                    game.pop_move()
                 
-                if v < current_v:
+                # a lost node still returns its first move, so a lost root
+                # plays on instead of forfeiting
+                if v < current_v or i == 0:
                     v = current_v
                     best_move = move
                 
                 #print("max  best_move", best_move[0], best_move[1], "move", move[0], move[1], "alpha", alpha, "beta", beta, "v", v, "\n")
                 if beta <= v:
                     #print("max node pruning")
-                    return (v, best_move)[isRoot == True]
+                    if ordering is not None:
+                        ordering.cutoff(move, ply, depth)
+                    if self.stats is not None:
+                        self.stats.cutoff(i)
+                    break
                 alpha = max(alpha, v)
                 
             #print("returning max alpha", alpha, "v", v, "\n")
-            return (v, best_move)[isRoot == True]
-                    
                     
         else:
             
             v = float("inf")
-            for move in game.get_legal_moves():
-                new_board = game.forecast_move(move)
+            for i, move in enumerate(moves):
+                new_board = None
+                if leaf_scores is None or move == extended:
+                    new_board = self.child(game, move)
                 
-                if depth == 0:
-                    current_v = self.score(new_board, self.searching_player)
+                if new_board is None:
+                    self.nodes += 1
+                    current_v = leaf_scores[i]
+                elif move == extended:
+                    self._extension += 1
+                    current_v = self.alphabeta_score(new_board, depth, alpha, beta, True, ply=ply + 1)
+                    self._extension -= 1
+                elif depth == 0:
+                    self.nodes += 1
+                    current_v = self.evaluate(new_board)
                     #print("min leafnode move", move[0], move[1], "value", v)
                 else:
-                    current_v = self.alphabeta_score(new_board, depth - 1, alpha, beta, True)
+                    reduction = reductions[min(i, len(reductions) - 1)] if reductions else 0
+                    if reduction:
+                        self.reduced_moves += 1
+                        current_v = self.alphabeta_score(new_board, depth - 1 - reduction,
+                                                         math.nextafter(beta, alpha), beta, True,
+                                                         ply=ply + 1)
+                    if not reduction or current_v < beta:
+                        if reduction:
+                            self.reduction_researches += 1
+                        current_v = self.alphabeta_score(new_board, depth - 1, alpha, beta, True, ply=ply + 1)
+                if self.in_place and new_board is not None:
+                    game.pop_move()
                     
-                if v < current_v:
+                if current_v < v or i == 0:
                     v = current_v
+                    best_move = move
                     
                 #print("min move", move[0], move[1], "alpha", alpha, "beta", beta, "v", v)
-                if alpha <= v:
+                if v <= alpha:
                     #print("min node pruning")
-                    return v
+                    if ordering is not None:
+                        ordering.cutoff(move, ply, depth)
+                    if self.stats is not None:
+                        self.stats.cutoff(i)
+                    break
                 beta = min(beta, v)
             #print("returning min beta", beta, "v", v)
-            return v
+
+        if tt is not None:
+            if v <= alpha_orig:
+                tt.store(key, depth, v, UPPER, best_move)
+            elif v >= beta_orig:
+                tt.store(key, depth, v, LOWER, best_move)
+            else:
+                tt.store(key, depth, v, EXACT, best_move)
+        if isRoot:
+            self.root_score = v
+        return (v, best_move)[isRoot == True]
     
+    def pvs_score(self, game, depth, alpha=float("-inf"), beta=float("inf"), color=1, isRoot=False, ply=0):
+        """ Return the negamax value of the game to the player to move (or the
+        best move if isRoot is True) using principal variation search.
+
+        Scores are the searching player's `self.score()` multiplied by color
+        (+1 when the searching player is to move, -1 otherwise), so both
+        search modes rank moves identically. The first move is searched with
+        the full (alpha, beta) window; every later move is scouted with a
+        null window (alpha and the next float above it), which only proves
+        whether it is better than alpha, and is re-searched with the full
+        window if it is. `ply` is the distance of the game from the root, as
+        in `alphabeta_score`.
+        """
+        if self.clock.expired():
+            raise SearchTimeout()
+
+        self.nodes += 1
+        if self.tablebase is not None and not isRoot:
+            value = self.probe_tablebase(game)
+            if value is not None:
+                return color * value
+
+        hash_move = None
+        tt = self.tt
+        if tt is not None:
+            # the table holds scores from the searching player's view
+            key = game.hash() ^ self.tt_salt
+            entry = tt.probe(key)
+            if entry is not None:
+                hash_move = entry[3]
+            if entry is not None and entry[0] >= depth and not isRoot:
+                _, tt_score, tt_flag, _ = entry
+                tt_score *= color
+                if tt_flag != EXACT and color < 0:
+                    tt_flag = LOWER if tt_flag == UPPER else UPPER
+                if tt_flag == EXACT:
+                    return tt_score
+                if tt_flag == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+            alpha_orig = alpha
+
+        moves = game.get_legal_moves()
+        ordering = self.ordering
+        if ordering is not None:
+            if isRoot and hash_move is None:
+                hash_move = self.pv_move
+            moves = ordering.order(moves, ply, hash_move)
+        extended = None
+        if self.extensions and self._extension < self.max_extension:
+            extended = self.extended_move(game, moves)
+        reductions = None
+        if self.reductions is not None:
+            reductions = self.reductions[min(depth, len(self.reductions) - 1)]
+
+        leaf_scores = self.leaf_scores(game, moves) if depth == 0 else None
+
+        v = float("-inf")
+        best_move = (-1,-1)
+        failed_high = False
+        for i, move in enumerate(moves):
+            new_board = None
+            if leaf_scores is None or move == extended:
+                new_board = self.child(game, move)
+
+            child_depth = depth - 1
+            if move == extended:
+                child_depth = depth
+                self._extension += 1
+            if new_board is None:
+                self.nodes += 1
+                current_v = color * leaf_scores[i]
+            elif child_depth < 0:
+                self.nodes += 1
+                current_v = color * self.evaluate(new_board)
+            elif i == 0:
+                current_v = -self.pvs_score(new_board, child_depth, -beta, -alpha, -color, ply=ply + 1)
+            else:
+                scout = math.nextafter(alpha, beta)
+                reduction = 0
+                if reductions and move != extended:
+                    reduction = reductions[min(i, len(reductions) - 1)]
+                if reduction:
+                    self.reduced_moves += 1
+                    current_v = -self.pvs_score(new_board, child_depth - reduction, -scout, -alpha,
+                                                -color, ply=ply + 1)
+                if not reduction or current_v > alpha:
+                    if reduction:
+                        self.reduction_researches += 1
+                    current_v = -self.pvs_score(new_board, child_depth, -scout, -alpha, -color, ply=ply + 1)
+                if alpha < current_v < beta:
+                    current_v = -self.pvs_score(new_board, child_depth, -beta, -alpha, -color, ply=ply + 1)
+            if move == extended:
+                self._extension -= 1
+            if self.in_place and new_board is not None:
+                game.pop_move()
+
+            if v < current_v or i == 0:
+                v = current_v
+                best_move = move
+
+            if beta <= v:
+                failed_high = True
+                if ordering is not None:
+                    ordering.cutoff(move, ply, depth)
+                if self.stats is not None:
+                    self.stats.cutoff(i)
+                break
+            alpha = max(alpha, v)
+
+        if tt is not None:
+            if failed_high:
+                flag = LOWER if color > 0 else UPPER
+            elif v > alpha_orig:
+                flag = EXACT
+            else:
+                flag = UPPER if color > 0 else LOWER
+            tt.store(key, depth, color * v, flag, best_move)
+        if isRoot:
+            self.root_score = v
+        return (v, best_move)[isRoot == True]
+
     def terminal_test(self, game):
         """ Return True if the game is over for the active player
         and False otherwise.
         """
-        if game and len(game.get_legal_moves()) > 0:
+        if game and game.mobility() > 0:
             return False
         #print("terminal test end - no legal moves")
         return True
+
+
+class MCTSNode(object):
+    """A node of the `MCTSPlayer` search tree.
+
+    The position is stored as bitmasks (see `isolation.bitboard`): the
+    blocked cells and the location masks of the player to move and of its
+    opponent. `wins` counts the rollouts won by the player who made the move
+    leading to the node. Nodes do not link back to their parent, so a
+    discarded subtree is freed by reference counting instead of waiting for
+    the (slow, for large trees) cyclic garbage collector.
+    """
+    __slots__ = ("move", "state", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, state, untried):
+        self.move = move
+        self.state = state
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo tree search
+    with UCT selection.
+
+    Each iteration descends the tree by UCT, expands one untried move, and
+    plays a batch of random games (rollouts) from the new node on the bitmask
+    encoding of the board, backing up their combined result. The subtree of
+    the position reached after the opponent's reply is kept for the next
+    call to get_move(). The move played is the most visited one.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The UCT exploration constant.
+
+    batch_size : int (optional)
+        The number of rollouts played from each expanded node.
+
+    seed : int (optional)
+        The seed of the random number generator used for rollouts.
+
+    See `IsolationPlayer` for the other parameters; `search_depth` and
+    `score_fn` are not used.
+
+    Attributes
+    ----------
+    iterations : int
+        The number of tree iterations run by the last call to get_move().
+
+    rollouts : int
+        The number of rollouts played by the last call to get_move().
+
+    rollouts_per_second : float
+        The rollout rate of the last call to get_move().
+
+    tree_size : int
+        The number of nodes in the current search tree.
+
+    reused_nodes : int
+        The number of nodes kept from the previous search at the start of the
+        last call to get_move().
+    """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 exploration=math.sqrt(2), batch_size=8, seed=None):
+        IsolationPlayer.__init__(self, search_depth, score_fn, timeout)
+        self.exploration = exploration
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.root = None
+        self.iterations = 0
+        self.rollouts = 0
+        self.rollouts_per_second = 0.
+        self.tree_size = 0
+        self.reused_nodes = 0
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        geometry, open_cells, active, inactive = board_masks(game)
+        self.geometry = geometry
+        state = (geometry.full & ~open_cells, active, inactive)
+        self.root = self.reuse_tree(state)
+        self.tree_size = self.reused_nodes = self.count_nodes(self.root)
+        self.iterations = 0
+        self.rollouts = 0
+        if not self.root.untried and not self.root.children:
+            return (-1, -1)
+
+        start = timeit.default_timer()
+        while not self.clock.expired():
+            self.iterate()
+        elapsed = timeit.default_timer() - start
+        self.rollouts_per_second = self.rollouts / elapsed if elapsed else 0.
+
+        if not self.root.children:
+            # no iteration completed; any legal move will do
+            return geometry.coords[self.root.untried[0].bit_length() - 1]
+        best = max(self.root.children, key=lambda child: child.visits)
+        return geometry.coords[best.move.bit_length() - 1]
+
+    def reuse_tree(self, state):
+        """Return the node of the previous tree for the position `state` (the
+        root itself, or the position after one move by each player) as the
+        new root, or a new root if the position is not in the tree.
+        """
+        root = self.root
+        if root is not None:
+            candidates = [root] + [grandchild for child in root.children
+                                   for grandchild in child.children]
+            for node in candidates:
+                if node.state == state:
+                    return node
+        return MCTSNode(None, state, self.moves(state))
+
+    def count_nodes(self, node):
+        """ Return the number of nodes in the subtree rooted at `node`. """
+        count = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
+    def moves(self, state):
+        """ Return the location masks of the legal moves in a position. """
+        blocked, active, _ = state
+        geometry = self.geometry
+        if active:
+            mask = geometry.attacks[active.bit_length() - 1] & ~blocked
+        else:
+            mask = geometry.full & ~blocked
+        moves = []
+        while mask:
+            move = mask & -mask
+            mask ^= move
+            moves.append(move)
+        return moves
+
+    def iterate(self):
+        """Run one iteration: select a node by UCT, expand one of its untried
+        moves, play a batch of rollouts from the new node and back up the
+        result.
+        """
+        node = self.root
+        path = [node]
+        log = math.log
+        sqrt = math.sqrt
+        exploration = self.exploration
+        while not node.untried and node.children:
+            log_visits = log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits +
+                       exploration * sqrt(log_visits / child.visits))
+            path.append(node)
+
+        if node.untried:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            blocked, active, inactive = node.state
+            state = (blocked | move, inactive, move)
+            child = MCTSNode(move, state, self.moves(state))
+            node.children.append(child)
+            self.tree_size += 1
+            node = child
+            path.append(node)
+
+        # wins of the player who moved into the node
+        batch = self.batch_size
+        wins = batch - self.rollout_batch(node.state, batch)
+        self.iterations += 1
+        self.rollouts += batch
+        for node in reversed(path):
+            node.visits += batch
+            node.wins += wins
+            wins = batch - wins
+
+    def rollout_batch(self, state, count):
+        """Play `count` random games from a position and return the number
+        won by the player to move.
+        """
+        attacks = self.geometry.attacks
+        full = self.geometry.full
+        choice = self.rng.choice
+        start_blocked, start_active, start_inactive = state
+        wins = 0
+        for _ in range(count):
+            blocked, active, inactive = start_blocked, start_active, start_inactive
+            turn = 0
+            while True:
+                if active:
+                    mask = attacks[active.bit_length() - 1] & ~blocked
+                else:
+                    mask = full & ~blocked
+                if not mask:
+                    break
+                moves = []
+                while mask:
+                    move = mask & -mask
+                    mask ^= move
+                    moves.append(move)
+                move = choice(moves)
+                blocked |= move
+                active, inactive = inactive, move
+                turn ^= 1
+            # the player to move at the end of the game has lost
+            wins += turn
+        return wins
+
+
+def _detach_players(game):
+    """Return a copy of the game with the players replaced by the tokens 1
+    and 2, so it can be sent to another process without the player objects.
+    """
+    position = game.copy()
+    first = game.active_player == game._player_1
+    position._player_1, position._player_2 = 1, 2
+    position._active_player, position._inactive_player = (1, 2) if first else (2, 1)
+    return position
+
+
+def _search_helper(conn, stop, table, settings):
+    """Process body of a helper search (a Lazy SMP helper, see
+    `AlphaBetaPlayer.lazy_smp`, or the ponder helper, see
+    `AlphaBetaPlayer.start_pondering`).
+
+    Each job (id, position, table generation, first depth, time limit in
+    milliseconds) is searched with iterative deepening, filling the shared
+    table, until the time limit runs out or the main process moves the
+    `stop` value off the id of the job. It is answered with the id, the
+    nodes, the depth of the last completed pass (or None), the best move,
+    the root score and the hash of the position.
+    """
+    # the main search (or the opponent's, while pondering) must return its
+    # move on time, so it gets the CPU first whenever a helper competes
+    # with it
+    if hasattr(os, "nice"):
+        os.nice(19)
+    player = AlphaBetaPlayer(**settings)
+    player.tt = table
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        job_id, game, generation, depth, time_limit = job
+        start = timeit.default_timer()
+
+        def time_left():
+            if stop.value != job_id:
+                return float("-inf")
+            return time_limit - 1000 * (timeit.default_timer() - start)
+
+        player.time_left = time_left
+        # the stop value is cheap to read, so check it at every node: the
+        # main process only waits for the helper's report until its deadline
+        player.clock.max_interval = 1
+        player.new_search()
+        table.generation = generation
+        best_move = player.iterative_deepening(game, depth=depth)
+        depth = player.depth_nodes[-1][0] if player.depth_nodes else None
+        conn.send((job_id, player.nodes, depth, best_move, player.root_score,
+                   game.hash()))
+    conn.close()
     
     
     
\ No newline at end of file
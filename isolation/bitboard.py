@@ -0,0 +1,403 @@
+"""
+This file contains the `BitBoard` class, an alternate implementation of the
+`isolation.Board` game model that stores the blocked cells and the player
+locations as Python int bitmasks instead of a list of cell values.
+
+Cells use the same column-major indexing as `Board` (index = row + column *
+height), so bit `i` of a mask corresponds to cell `i` of `Board._board_state`.
+Knight moves for any set of cells are generated with one shift-and-mask per
+direction, which makes move generation, copying and hashing several times
+cheaper than the list-based board while keeping the public API unchanged.
+"""
+from functools import lru_cache
+
+from .isolation import Board, get_zobrist_keys
+
+# knight directions as (row, column) offsets, in the same order as Board
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+class _Geometry(object):
+    """Precomputed masks for a board of a given size.
+
+    Attributes
+    ----------
+    full : int
+        A mask with one bit set for every cell on the board.
+
+    left_shifts : list<(int, int)>
+        (shift, source mask) pairs for the directions that move a cell to a
+        higher index; the source mask keeps only the cells whose destination
+        in that direction is on the board.
+
+    right_shifts : list<(int, int)>
+        (shift, source mask) pairs for the directions that move a cell to a
+        lower index.
+
+    coords : tuple<(int, int)>
+        The (row, column) coordinate pair of every cell index.
+
+    attacks : tuple<int>
+        The knight move mask of every cell index, built with the shifts above
+        so that single-piece move generation is one table lookup.
+
+    light : int
+        A mask of the cells whose row + column is even; every knight move
+        goes from a light cell to a dark one or back.
+    """
+    def __init__(self, width, height):
+        self.full = (1 << (width * height)) - 1
+        self.coords = tuple((idx % height, idx // height)
+                            for idx in range(width * height))
+        self.left_shifts = []
+        self.right_shifts = []
+        for dr, dc in DIRECTIONS:
+            src = 0
+            for r, c in self.coords:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    src |= 1 << (r + c * height)
+            shift = dr + dc * height
+            if shift > 0:
+                self.left_shifts.append((shift, src))
+            else:
+                self.right_shifts.append((-shift, src))
+        self.attacks = tuple(knight_moves(1 << idx, self)
+                             for idx in range(width * height))
+        self.light = sum(1 << idx for idx, (r, c) in enumerate(self.coords)
+                         if (r + c) % 2 == 0)
+
+
+@lru_cache(maxsize=None)
+def get_geometry(width, height):
+    """Return the shared `_Geometry` tables for a board of the given size,
+    building them on first use.
+    """
+    return _Geometry(width, height)
+
+
+def knight_moves(cells, geometry):
+    """Return the mask of every cell one knight move away from any cell in
+    the `cells` mask (ignoring blocked cells).
+
+    Parameters
+    ----------
+    cells : int
+        A bitmask of source cells.
+
+    geometry : _Geometry
+        The geometry tables for the board size.
+
+    Returns
+    -------
+    int
+        The bitmask of destination cells.
+    """
+    moves = 0
+    for shift, src in geometry.left_shifts:
+        moves |= (cells & src) << shift
+    for shift, src in geometry.right_shifts:
+        moves |= (cells & src) >> shift
+    return moves
+
+
+def popcount(mask):
+    """ Return the number of bits set in the mask. """
+    return bin(mask).count("1")
+
+
+class BitBoard(Board):
+    """Drop-in replacement for `isolation.Board` backed by int bitmasks.
+
+    The constructor and every public method have the same signature and
+    semantics as `Board`. Legal moves are returned in ascending cell index
+    order (the order of `get_blank_spaces`) rather than in direction order.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+        self._geometry = get_geometry(width, height)
+        self._zobrist_keys = get_zobrist_keys(width, height)
+        self._hash = 0
+
+        # Blocked cells, and a single-bit mask for the location of each
+        # player (0 if the player has not moved yet)
+        self._blocked = 0
+        self._p1_bit = 0
+        self._p2_bit = 0
+
+        # (blocked, p1 location, p2 location, hash) saved by push_move()
+        self._undo_stack = []
+
+    @classmethod
+    def from_board(cls, board):
+        """Return a `BitBoard` encoding the same game state as a list-based
+        `isolation.Board`.
+        """
+        new_board = cls(board._player_1, board._player_2,
+                        width=board.width, height=board.height)
+        new_board.move_count = board.move_count
+        new_board._active_player = board._active_player
+        new_board._inactive_player = board._inactive_player
+        for idx, value in enumerate(board._board_state[:-3]):
+            if value != Board.BLANK:
+                new_board._blocked |= 1 << idx
+        if board._board_state[-1] != Board.NOT_MOVED:
+            new_board._p1_bit = 1 << board._board_state[-1]
+        if board._board_state[-2] != Board.NOT_MOVED:
+            new_board._p2_bit = 1 << board._board_state[-2]
+        new_board._hash = board._compute_hash()
+        return new_board
+
+    def hash(self):
+        """ Return the 64-bit Zobrist hash of the current state; see
+        `Board.hash`.
+        """
+        return self._hash
+
+    def _compute_hash(self):
+        """ Recompute the Zobrist hash of the current state from scratch. """
+        keys = self._zobrist_keys
+        value = 0
+        blocked = self._blocked
+        while blocked:
+            low = blocked & -blocked
+            value ^= keys.blocked[low.bit_length() - 1]
+            blocked ^= low
+        for player, bit in enumerate((self._p1_bit, self._p2_bit)):
+            if bit:
+                value ^= keys.locations[player][bit.bit_length() - 1]
+        if self._active_player != self._player_1:
+            value ^= keys.player_2_to_move
+        return value
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.__dict__.update(self.__dict__)
+        new_board._undo_stack = []
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._decode(self._geometry.full & ~self._blocked)
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        bit = self._player_bit(player)
+        if not bit:
+            return Board.NOT_MOVED
+        return self._geometry.coords[bit.bit_length() - 1]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        return self._decode(self._moves_mask(self._player_bit(player)))
+
+    def mobility(self, player=None):
+        """Return the number of legal moves of the specified player without
+        generating them; see `Board.mobility`.
+        """
+        if player is None:
+            player = self._active_player
+        return popcount(self._moves_mask(self._player_bit(player)))
+
+    def move_mobilities(self, moves):
+        """Return the mobility of both players after each of the given moves
+        of the active player, without applying the moves; see
+        `Board.move_mobilities`.
+        """
+        attacks = self._geometry.attacks
+        height = self.height
+        open_cells = ~self._blocked
+        opp_moves = self._moves_mask(self._player_bit(self._inactive_player))
+        result = []
+        for r, c in moves:
+            idx = r + c * height
+            result.append((popcount(attacks[idx] & open_cells),
+                           popcount(opp_moves & ~(1 << idx))))
+        return result
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        bit = 1 << idx
+        keys = self._zobrist_keys
+        if self._active_player == self._player_1:
+            locations = keys.locations[0]
+            if self._p1_bit:
+                self._hash ^= locations[self._p1_bit.bit_length() - 1]
+            self._p1_bit = bit
+        else:
+            locations = keys.locations[1]
+            if self._p2_bit:
+                self._hash ^= locations[self._p2_bit.bit_length() - 1]
+            self._p2_bit = bit
+        self._hash ^= locations[idx] ^ keys.blocked[idx] ^ keys.player_2_to_move
+        self._blocked |= bit
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Apply a move in-place, recording what is needed to revert it with
+        `pop_move()`; see `Board.push_move`.
+        """
+        self._undo_stack.append((self._blocked, self._p1_bit, self._p2_bit, self._hash))
+        self.apply_move(move)
+        return self
+
+    def pop_move(self):
+        """Revert the most recent move applied with `push_move()`. """
+        self._blocked, self._p1_bit, self._p2_bit, self._hash = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._has_moves()
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._has_moves()
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player; see `Board.utility`.
+        """
+        if not self._has_moves():
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                bit = 1 << (i + j * self.height)
+                if not self._blocked & bit:
+                    out += ' '
+                elif self._p1_bit == bit:
+                    out += symbols[0]
+                elif self._p2_bit == bit:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
+
+    def _player_bit(self, player):
+        """ Return the location mask of a registered player. """
+        if player == self._player_1:
+            return self._p1_bit
+        elif player == self._player_2:
+            return self._p2_bit
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _moves_mask(self, bit):
+        """ Return the mask of open cells a player at `bit` can move to. """
+        if not bit:
+            return self._geometry.full & ~self._blocked
+        return self._geometry.attacks[bit.bit_length() - 1] & ~self._blocked
+
+    def _has_moves(self):
+        """ Return True if the active player has at least one legal move. """
+        return self._moves_mask(self._player_bit(self._active_player)) != 0
+
+    def _decode(self, mask):
+        """ Return the coordinate pairs of the cells set in a mask. """
+        coords = self._geometry.coords
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return cells
@@ -9,11 +9,84 @@ be available to project reviewers.
 """
 import random
 import timeit
+from contextlib import contextmanager
 from copy import copy
+from functools import lru_cache
 
 TIME_LIMIT_MILLIS = 150
 
 
+@lru_cache(maxsize=None)
+def get_knight_moves(width, height):
+    """Return the knight move table for a board of the given size, building
+    it on first use.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns on the board.
+
+    height : int
+        The number of rows on the board.
+
+    Returns
+    -------
+    tuple<tuple<(int, (int, int))>>
+        For each cell index (row + column * height), a tuple of (index,
+        (row, column)) pairs for every in-bounds knight destination, in the
+        fixed direction order used by `Board`.
+    """
+    directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+    return tuple(
+        tuple((r + dr + (c + dc) * height, (r + dr, c + dc))
+              for dr, dc in directions
+              if 0 <= r + dr < height and 0 <= c + dc < width)
+        for c, r in ((idx // height, idx % height)
+                     for idx in range(width * height)))
+
+
+@lru_cache(maxsize=None)
+def get_knight_degrees(width, height):
+    """Return the number of knight moves from each cell index of an empty
+    board of the given size, building the table on first use.
+    """
+    return tuple(len(moves) for moves in get_knight_moves(width, height))
+
+
+class ZobristKeys(object):
+    """Random 64-bit keys used to maintain an incremental Zobrist hash of the
+    game state. The keys are generated from a fixed seed, so the hash of a
+    position is reproducible across runs and processes.
+
+    Attributes
+    ----------
+    blocked : tuple<int>
+        The key for each blocked cell index.
+
+    locations : (tuple<int>, tuple<int>)
+        The keys for player 1 and player 2 standing on each cell index.
+
+    player_2_to_move : int
+        The key folded in while player 2 holds the initiative.
+    """
+    def __init__(self, width, height):
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        size = width * height
+        self.blocked = tuple(rng.getrandbits(64) for _ in range(size))
+        self.locations = (tuple(rng.getrandbits(64) for _ in range(size)),
+                          tuple(rng.getrandbits(64) for _ in range(size)))
+        self.player_2_to_move = rng.getrandbits(64)
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(width, height):
+    """Return the shared `ZobristKeys` for a board of the given size,
+    building them on first use.
+    """
+    return ZobristKeys(width, height)
+
+
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
     a knight in chess.
@@ -45,6 +118,8 @@ class Board(object):
         self._player_2 = player_2
         self._active_player = player_1
         self._inactive_player = player_2
+        self._knight_moves = get_knight_moves(width, height)
+        self._zobrist_keys = get_zobrist_keys(width, height)
 
         # The last 3 entries of the board state includes initiative (0 for
         # player 1, 1 for player 2) player 2 last move, and player 1 last move
@@ -52,8 +127,45 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # 64-bit Zobrist hash of the state, updated by apply_move(); valid
+        # while _hash_state is _board_state (see hash())
+        self._hash = 0
+        self._hash_state = self._board_state
+
+        # Number of blank cells a knight's move away from each cell, updated
+        # by apply_move() and pop_move(); valid while _degrees_state is
+        # _board_state (see mobility())
+        self._degrees = list(get_knight_degrees(width, height))
+        self._degrees_state = self._board_state
+
+        # (previous location, previous hash) of the moving player for each
+        # move applied with push_move(), to be reverted with pop_move()
+        self._undo_stack = []
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the 64-bit Zobrist hash of the current state, which covers
+        the blocked cells, the location of each player and the player to
+        move. The hash is maintained incrementally, so this is O(1), except
+        after `_board_state` was replaced, when it is recomputed once.
+        """
+        if self._hash_state is not self._board_state:
+            self._hash = self._compute_hash()
+            self._hash_state = self._board_state
+        return self._hash
+
+    def _compute_hash(self):
+        """ Recompute the Zobrist hash of the current state from scratch. """
+        keys = self._zobrist_keys
+        value = 0
+        for idx, cell in enumerate(self._board_state[:-3]):
+            if cell != Board.BLANK:
+                value ^= keys.blocked[idx]
+        for player, loc in enumerate((self._board_state[-1], self._board_state[-2])):
+            if loc != Board.NOT_MOVED:
+                value ^= keys.locations[player][loc]
+        if self._board_state[-3]:
+            value ^= keys.player_2_to_move
+        return value
 
     @property
     def active_player(self):
@@ -92,11 +204,26 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        new_board = Board.__new__(Board)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
+        new_board._knight_moves = self._knight_moves
+        new_board._zobrist_keys = self._zobrist_keys
         new_board._board_state = copy(self._board_state)
+        new_board._hash = self.hash()
+        new_board._hash_state = new_board._board_state
+        if self._degrees_state is self._board_state:
+            new_board._degrees = copy(self._degrees)
+            new_board._degrees_state = new_board._board_state
+        else:
+            new_board._degrees = None
+            new_board._degrees_state = None
+        new_board._undo_stack = []
         return new_board
 
     def forecast_move(self, move):
@@ -187,8 +314,90 @@ class Board(object):
             for the player constrained by the current game state.
         """
         if player is None:
-            player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+            player = self._active_player
+        if player == self._player_1:
+            idx = self._board_state[-1]
+        elif player == self._player_2:
+            idx = self._board_state[-2]
+        else:
+            raise RuntimeError(
+                "Invalid player in get_legal_moves: {}".format(player))
+        return self.__get_moves(idx)
+
+    def mobility(self, player=None):
+        """Return the number of legal moves of the specified player, i.e.,
+        `len(self.get_legal_moves(player))`, without generating the moves.
+        Once the player has moved this is O(1): the number of blank cells
+        around every cell is maintained incrementally.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the mobility of the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves of the player.
+        """
+        if player is None:
+            player = self._active_player
+        if player == self._player_1:
+            idx = self._board_state[-1]
+        elif player == self._player_2:
+            idx = self._board_state[-2]
+        else:
+            raise RuntimeError(
+                "Invalid player in mobility: {}".format(player))
+        if idx == Board.NOT_MOVED:
+            return self._board_state[:-3].count(Board.BLANK)
+        if self._degrees_state is not self._board_state:
+            self._count_degrees()
+        return self._degrees[idx]
+
+    def _count_degrees(self):
+        """ Recount the blank neighbors of every cell from scratch, e.g.,
+        after `_board_state` was replaced.
+        """
+        board_state = self._board_state
+        self._degrees = [sum(1 for dest, _ in moves if board_state[dest] == Board.BLANK)
+                         for moves in self._knight_moves]
+        self._degrees_state = board_state
+
+    def move_mobilities(self, moves):
+        """Return the mobility of both players after each of the given moves
+        of the active player, without applying the moves: the pairs
+        `(child.mobility(mover), child.mobility(opponent))` where `child` is
+        `self.forecast_move(move)`. This is a single pass over the moves
+        reading the degree table, which lets score functions evaluate all
+        the children of a position at once (see `GreedyPlayer`).
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            Legal moves of the active player.
+
+        Returns
+        -------
+        list<(int, int)>
+            The (mover, opponent) mobility after each move.
+        """
+        board_state = self._board_state
+        if self._degrees_state is not board_state:
+            self._count_degrees()
+        degrees = self._degrees
+        height = self.height
+        opp_idx = board_state[-2] if self._active_player == self._player_1 else board_state[-1]
+        if opp_idx == Board.NOT_MOVED:
+            blanks = board_state[:-3].count(Board.BLANK) - 1
+            return [(degrees[r + c * height], blanks) for r, c in moves]
+        # a move a knight's move away from the opponent takes one of its moves
+        opp_row, opp_col = opp_idx % height, opp_idx // height
+        opp_degree = degrees[opp_idx]
+        return [(degrees[r + c * height],
+                 opp_degree - (abs((r - opp_row) * (c - opp_col)) == 2))
+                for r, c in moves]
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -201,19 +410,81 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        keys = self._zobrist_keys
+        locations = keys.locations[last_move_idx - 1]
+        last_idx = self._board_state[-last_move_idx]
+        if last_idx != Board.NOT_MOVED:
+            self._hash ^= locations[last_idx]
+        self._hash ^= locations[idx] ^ keys.blocked[idx] ^ keys.player_2_to_move
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
+        if self._degrees_state is self._board_state:
+            degrees = self._degrees
+            for dest, _ in self._knight_moves[idx]:
+                degrees[dest] -= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push_move(self, move):
+        """Apply a move to the current board in-place, recording what is
+        needed to revert it with `pop_move()`. Unlike `forecast_move()`, this
+        does not allocate a new board.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        isolation.Board
+            The board itself, with the move applied.
+        """
+        last_move_idx = int(self._active_player == self._player_2) + 1
+        self._undo_stack.append((self._board_state[-last_move_idx], self.hash()))
+        self.apply_move(move)
+        return self
+
+    def pop_move(self):
+        """Revert the most recent move applied with `push_move()`. """
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+        last_move_idx = int(self._active_player == self._player_2) + 1
+        idx = self._board_state[-last_move_idx]
+        self._board_state[idx] = Board.BLANK
+        if self._degrees_state is self._board_state:
+            degrees = self._degrees
+            for dest, _ in self._knight_moves[idx]:
+                degrees[dest] += 1
+        self._board_state[-last_move_idx], self._hash = self._undo_stack.pop()
+        self._board_state[-3] ^= 1
+
+    @contextmanager
+    def pushed_move(self, move):
+        """Context manager that applies a move in-place with `push_move()` and
+        reverts it with `pop_move()` on exit, even if an exception is raised.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self.push_move(move)
+        try:
+            yield self
+        finally:
+            self.pop_move()
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self.mobility(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self.mobility(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +508,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self.mobility(self._active_player):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,18 +518,16 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def __get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell index `idx`.
         """
-        if loc == Board.NOT_MOVED:
+        if idx == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
+        board_state = self._board_state
+        valid_moves = [move for dest, move in self._knight_moves[idx]
+                       if board_state[dest] == Board.BLANK]
         #random.shuffle(valid_moves)
         return valid_moves
 
@@ -299,6 +568,10 @@ class Board(object):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
+        After each move is applied, any player object with a
+        `notify_move(game, move)` method is called with a copy of the updated
+        board and the move that was played.
+
         Parameters
         ----------
         time_limit : numeric (optional)
@@ -340,3 +613,10 @@ class Board(object):
             move_history.append(list(curr_move))
 
             self.apply_move(curr_move)
+
+            # let players that track the game (e.g., to ponder on the
+            # opponent's time) know which move was played
+            for player in (self._player_1, self._player_2):
+                notify_move = getattr(player, "notify_move", None)
+                if notify_move is not None:
+                    notify_move(self.copy(), curr_move)
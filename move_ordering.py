@@ -0,0 +1,128 @@
+"""This file contains pluggable move ordering stages for alpha-beta search.
+
+Each stage assigns a sort key to every candidate move; `MoveOrdering` sorts
+the moves by the keys of its stages in turn, so earlier stages take
+precedence and later stages break ties. Stages learn from the moves that
+caused beta cutoffs during the search.
+"""
+
+
+class HashMoveStage(object):
+    """Search the best move stored for the position (from the transposition
+    table, or the principal variation at the root) first.
+    """
+    def key(self, move, ply, hash_move):
+        return move != hash_move
+
+    def cutoff(self, move, ply, depth):
+        pass
+
+    def new_search(self):
+        pass
+
+
+class KillerStage(object):
+    """Search the moves that most recently caused a cutoff at the same ply
+    (in a sibling position) before the others.
+
+    Parameters
+    ----------
+    slots : int (optional)
+        The number of killer moves remembered per ply.
+    """
+    def __init__(self, slots=2):
+        self.slots = slots
+        self.killers = {}
+
+    def key(self, move, ply, hash_move):
+        killers = self.killers.get(ply)
+        if killers and move in killers:
+            return killers.index(move)
+        return self.slots
+
+    def cutoff(self, move, ply, depth):
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.slots:]
+
+    def new_search(self):
+        self.killers.clear()
+
+
+class HistoryStage(object):
+    """Search the moves (target cells) that caused the most cutoffs, weighted
+    by the depth of the cutoff, before the others. Scores are halved at the
+    start of each search so the history follows the game.
+    """
+    def __init__(self):
+        self.history = {}
+
+    def key(self, move, ply, hash_move):
+        return -self.history.get(move, 0)
+
+    def cutoff(self, move, ply, depth):
+        self.history[move] = self.history.get(move, 0) + (depth + 1) ** 2
+
+    def new_search(self):
+        for move in self.history:
+            self.history[move] //= 2
+
+
+# Stage names accepted by `MoveOrdering`
+STAGES = {
+    "hash": HashMoveStage,
+    "killer": KillerStage,
+    "history": HistoryStage,
+}
+
+
+class MoveOrdering(object):
+    """Order moves with a sequence of stages.
+
+    Parameters
+    ----------
+    stages : iterable
+        Stage objects, or names from `STAGES` ("hash", "killer", "history"),
+        in order of precedence.
+    """
+    def __init__(self, stages=("hash", "killer", "history")):
+        self.stages = [STAGES[stage]() if isinstance(stage, str) else stage
+                       for stage in stages]
+
+    def order(self, moves, ply, hash_move=None):
+        """Return the moves sorted for search at the given ply.
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            The legal moves in the position.
+
+        ply : int
+            The distance of the position from the root of the search.
+
+        hash_move : (int, int) (optional)
+            The best move previously found in the position, if known.
+
+        Returns
+        -------
+        list<(int, int)>
+            The moves, best candidates first.
+        """
+        stages = self.stages
+        if len(stages) == 1:
+            key = stages[0].key
+            return sorted(moves, key=lambda move: key(move, ply, hash_move))
+        return sorted(moves, key=lambda move: tuple(
+            stage.key(move, ply, hash_move) for stage in stages))
+
+    def cutoff(self, move, ply, depth):
+        """ Record that `move` caused a beta cutoff at the given ply. """
+        for stage in self.stages:
+            stage.cutoff(move, ply, depth)
+
+    def new_search(self):
+        """ Prepare the stages for a new call to get_move(). """
+        for stage in self.stages:
+            stage.new_search()
@@ -0,0 +1,257 @@
+"""This file contains an opening book for Isolation: an offline builder that
+searches every opening position up to a given number of plies, and a reader
+that looks up the stored moves in O(1) from a memory-mapped file.
+
+Positions are reduced by the symmetries of the board (the knight move graph
+is unchanged by reflections, and by rotations and transposition on square
+boards), so each position is searched and stored once for its whole
+symmetry class. Positions are keyed from the point of view of the player to
+move, with Zobrist keys (see `isolation.get_zobrist_keys`) for the blocked
+cells and the locations of the player to move and of its opponent.
+
+The book file is a header followed by an open-addressed hash table of
+fixed-size (key, move) slots, so lookups only touch the pages they probe,
+and every process using the book shares the same page cache.
+
+Run this file to build the default book:
+
+    python opening_book.py [path]
+"""
+import mmap
+import struct
+import sys
+from functools import lru_cache
+
+from isolation import Board
+from isolation.isolation import get_zobrist_keys
+from endgame import board_masks
+
+MAGIC = b"ISOBOOK1"
+HEADER = struct.Struct("<8sHHHI")  # magic, width, height, plies, slots
+SLOT = struct.Struct("<QB")  # canonical key, move cell index
+EMPTY = 0xFF  # move value of an empty slot
+
+BOOK_PATH = "opening_book.bin"  # default book file
+BOOK_PLIES = 3  # positions with fewer moves played are in the default book
+BOOK_DEPTH = 7  # search depth used for each position of the default book
+
+
+@lru_cache(maxsize=None)
+def get_symmetries(width, height):
+    """Return the cell index permutations of the board symmetries.
+
+    Returns
+    -------
+    tuple<tuple<int>>
+        One permutation per symmetry (the identity first); entry `idx` is
+        the index of the cell that cell `idx` is mapped to.
+    """
+    maps = [lambda r, c: (r, c),
+            lambda r, c: (height - 1 - r, c),
+            lambda r, c: (r, width - 1 - c),
+            lambda r, c: (height - 1 - r, width - 1 - c)]
+    if width == height:
+        maps += [lambda r, c: (c, r),
+                 lambda r, c: (width - 1 - c, r),
+                 lambda r, c: (c, height - 1 - r),
+                 lambda r, c: (width - 1 - c, height - 1 - r)]
+    symmetries = []
+    for transform in maps:
+        perm = []
+        for idx in range(width * height):
+            r, c = transform(idx % height, idx // height)
+            perm.append(r + c * height)
+        symmetries.append(tuple(perm))
+    return tuple(symmetries)
+
+
+def canonical_key(game):
+    """Return the key of the position of a game shared by its whole
+    symmetry class.
+
+    Returns
+    -------
+    (int, tuple<int>)
+        The smallest key over the symmetries of the board, and the cell
+        index permutation that produces it.
+    """
+    geometry, open_cells, active, inactive = board_masks(game)
+    keys = get_zobrist_keys(game.width, game.height)
+    blocked = []
+    mask = geometry.full & ~open_cells
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        blocked.append(low.bit_length() - 1)
+    locations = [(keys.locations[player], bit.bit_length() - 1)
+                 for player, bit in enumerate((active, inactive)) if bit]
+
+    best = None
+    for perm in get_symmetries(game.width, game.height):
+        value = 0
+        for idx in blocked:
+            value ^= keys.blocked[perm[idx]]
+        for player_keys, idx in locations:
+            value ^= player_keys[perm[idx]]
+        if best is None or value < best[0]:
+            best = (value, perm)
+    return best
+
+
+class OpeningBook(object):
+    """Read-only opening book backed by a memory-mapped book file.
+
+    Parameters
+    ----------
+    path : str
+        The path of a book written by `build_book`.
+
+    Attributes
+    ----------
+    width, height : int
+        The board size the book was built for.
+
+    plies : int
+        The book holds the positions with fewer than this many moves played.
+
+    hits : int
+        The number of lookups that found a move.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as book_file:
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.plies, self.slots = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("Not an opening book: {}".format(path))
+        self.hits = 0
+
+    def close(self):
+        """ Unmap the book file. """
+        self._map.close()
+
+    def __len__(self):
+        return sum(1 for slot in range(self.slots) if self._slot(slot)[1] != EMPTY)
+
+    def _slot(self, slot):
+        return SLOT.unpack_from(self._map, HEADER.size + slot * SLOT.size)
+
+    def lookup(self, game):
+        """Return the book move for the position of a game.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The board coordinates of the book move, or None if the position
+            is not in the book.
+        """
+        if (game.move_count >= self.plies or game.width != self.width or
+                game.height != self.height):
+            return None
+        key, perm = canonical_key(game)
+        slot = key % self.slots
+        while True:
+            stored_key, move = self._slot(slot)
+            if move == EMPTY:
+                return None
+            if stored_key == key:
+                break
+            slot = (slot + 1) % self.slots
+        # map the move from the canonical frame back to the game's
+        idx = perm.index(move)
+        self.hits += 1
+        return (idx % self.height, idx // self.height)
+
+
+def opening_positions(width, height, plies):
+    """Return one game for each symmetry class of the positions with fewer
+    than `plies` moves played (and at least one legal move).
+
+    Returns
+    -------
+    dict
+        A map from canonical key to (game, permutation) pairs.
+    """
+    positions = {}
+    frontier = [Board("player_1", "player_2", width, height)]
+    for _ in range(plies):
+        next_frontier = []
+        for game in frontier:
+            key, perm = canonical_key(game)
+            if key in positions or not game.get_legal_moves():
+                continue
+            positions[key] = (game, perm)
+            next_frontier.extend(game.forecast_move(move)
+                                 for move in game.get_legal_moves())
+        frontier = next_frontier
+    return positions
+
+
+def build_book(path, player, width=7, height=7, plies=BOOK_PLIES,
+               depth=BOOK_DEPTH, verbose=False):
+    """Search every opening position and write the book file.
+
+    Parameters
+    ----------
+    path : str
+        The file to write.
+
+    player : game_agent.AlphaBetaPlayer
+        The player whose fixed-depth `alphabeta` search picks each move.
+
+    width, height : int (optional)
+        The board size.
+
+    plies : int (optional)
+        The positions with fewer than this many moves played are searched.
+
+    depth : int (optional)
+        The search depth used for each position.
+
+    verbose : bool (optional)
+        If True, print progress.
+
+    Returns
+    -------
+    int
+        The number of positions in the book.
+    """
+    positions = opening_positions(width, height, plies)
+    slots = max(1, 2 * len(positions))
+    table = [(0, EMPTY)] * slots
+    player.time_left = lambda: float("inf")
+    for count, (key, (game, perm)) in enumerate(sorted(positions.items())):
+        # deepen iteratively so each pass orders the moves of the next
+        player.new_search()
+        for pass_depth in range(1, depth + 1):
+            move = player.pv_move = player.alphabeta(game, pass_depth)
+        slot = key % slots
+        while table[slot][1] != EMPTY:
+            slot = (slot + 1) % slots
+        table[slot] = (key, perm[move[0] + move[1] * height])
+        if verbose:
+            print("{}/{} move {} -> {}".format(count + 1, len(positions),
+                                               game.move_count, move))
+
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, width, height, plies, slots))
+        for entry in table:
+            book_file.write(SLOT.pack(*entry))
+    return len(positions)
+
+
+def main():
+    from game_agent import AlphaBetaPlayer
+    path = sys.argv[1] if len(sys.argv) > 1 else BOOK_PATH
+    player = AlphaBetaPlayer(tt_size=2**18, move_ordering=("hash", "killer", "history"))
+    count = build_book(path, player, verbose=True)
+    print("Wrote {} positions to {}".format(count, path))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,11 @@ own agent and example heuristic functions.
     ************************************************************************
 """
 
+from functools import partial
 from random import randint
 
+from features import get_features
+
 
 def null_score(game, player):
     """This heuristic presumes no knowledge for non-terminal states, and
@@ -39,6 +42,30 @@ def null_score(game, player):
     return 0.
 
 
+def mobility_batch(game, player, moves, opp_weight=-1):
+    """Score the position after each of the given legal moves of the active
+    player at once: -inf or +inf if the player has lost or won there, and
+    otherwise its number of legal moves plus `opp_weight` times the number
+    of legal moves of its opponent. The numbers are read from
+    `game.move_mobilities(moves)`, so no child board is built.
+
+    A score function supports batch scoring when it has a `batch(game,
+    player, moves)` attribute returning `[score(game.forecast_move(move),
+    player) for move in moves]`; this is that attribute for
+    `improved_score` (opp_weight=-1) and `open_move_score` (opp_weight=0).
+    """
+    mover = player == game.active_player
+    scores = []
+    for mover_moves, opp_moves in game.move_mobilities(moves):
+        if not opp_moves:
+            scores.append(float("inf") if mover else float("-inf"))
+        elif mover:
+            scores.append(float(mover_moves + opp_weight * opp_moves))
+        else:
+            scores.append(float(opp_moves + opp_weight * mover_moves))
+    return scores
+
+
 def open_move_score(game, player):
     """The basic evaluation function described in lecture that outputs a score
     equal to the number of moves open for your computer player on the board.
@@ -65,7 +92,10 @@ def open_move_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+    return float(game.mobility(player))
+
+
+open_move_score.batch = partial(mobility_batch, opp_weight=0)
 
 
 def improved_score(game, player):
@@ -95,12 +125,15 @@ def improved_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.mobility(player)
+    opp_moves = game.mobility(game.get_opponent(player))
     #print("own moves", own_moves, "opponent moves", opp_moves)
     return float(own_moves - opp_moves)
 
 
+improved_score.batch = mobility_batch
+
+
 def center_score(game, player):
     """Outputs a score equal to square of the distance from the center of the
     board to the position of the player.
@@ -129,9 +162,8 @@ def center_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    w, h = game.width / 2., game.height / 2.
     y, x = game.get_player_location(player)
-    return float((h - y)**2 + (w - x)**2)
+    return get_features(game.width, game.height).center[y + x * game.height]
 
 
 class RandomPlayer():
@@ -196,6 +228,10 @@ class GreedyPlayer():
         legal_moves = game.get_legal_moves()
         if not legal_moves:
             return (-1, -1)
+        batch = getattr(self.score, "batch", None)
+        if batch is not None:
+            _, move = max(zip(batch(game, self, legal_moves), legal_moves))
+            return move
         _, move = max([(self.score(game.forecast_move(m), self), m) for m in legal_moves])
         return move
 
@@ -0,0 +1,135 @@
+"""This file contains per-move search statistics for the game-playing agents.
+
+Statistics are off by default. `SearchStats.attach(player)` turns them on
+for one player by wrapping its `get_move` and `score` functions, so a player
+without statistics runs exactly the same code as before; the only counter
+updated inside the search itself is the cutoff histogram, and only when a
+cutoff happens.
+"""
+import timeit
+
+
+class SearchStats(object):
+    """Counters of the search made by a player for each move.
+
+    Parameters
+    ----------
+    callback : callable (optional)
+        Called with the `SearchStats` object at the end of every call to the
+        player's get_move(), e.g., to aggregate the counters of a tournament.
+
+    Attributes
+    ----------
+    moves : int
+        The number of moves recorded since the statistics were attached.
+
+    nodes : int
+        The number of nodes visited for the last move, as counted by the
+        player (its `nodes` attribute), or the number of leaf evaluations
+        for players that do not count nodes.
+
+    leaves : int
+        The number of positions scored by the player's score function for
+        the last move, including those scored by its batch form.
+
+    cutoffs : list<int>
+        For the last move, cutoffs[i] is the number of beta cutoffs caused by
+        the (i+1)-th move searched at a node; good move ordering puts most of
+        them in cutoffs[0].
+
+    tt_hits : int
+        The number of transposition table probes that found an entry during
+        the last move (0 for players without a table).
+
+    depth : int or None
+        The depth of the last iterative deepening pass completed for the last
+        move, or None for players that do not deepen iteratively.
+
+    reduced_moves : int
+        The number of moves searched to a reduced depth by late move
+        reductions for the last move (0 for players without them).
+
+    reduction_researches : int
+        The number of those moves searched again to the full depth.
+
+    time : float
+        The number of milliseconds spent in get_move() for the last move.
+
+    nodes_per_second : float
+        The node rate of the last move.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.moves = 0
+        self.start_move()
+        self.time = 0.
+        self.nodes_per_second = 0.
+
+    def attach(self, player):
+        """Record the statistics of a player from its next move on.
+
+        Returns
+        -------
+        SearchStats
+            This object, which is also set as `player.stats`.
+        """
+        get_move, score = player.get_move, player.score
+
+        def counting_score(game, scored_player):
+            self.leaves += 1
+            return score(game, scored_player)
+
+        batch = getattr(score, "batch", None)
+        if batch is not None:
+            def counting_batch(game, scored_player, moves):
+                self.leaves += len(moves)
+                return batch(game, scored_player, moves)
+            counting_score.batch = counting_batch
+
+        def timed_get_move(game, time_left):
+            self.start_move()
+            tt = getattr(player, "tt", None)
+            tt_hits = tt.hits if tt is not None else 0
+            start = timeit.default_timer()
+            move = get_move(game, time_left)
+            self.end_move(player, timeit.default_timer() - start,
+                          tt.hits - tt_hits if tt is not None else 0)
+            return move
+
+        player.score = counting_score
+        player.get_move = timed_get_move
+        player.stats = self
+        return self
+
+    def start_move(self):
+        """ Reset the per-move counters. """
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = []
+        self.tt_hits = 0
+        self.depth = None
+        self.reduced_moves = 0
+        self.reduction_researches = 0
+
+    def cutoff(self, index):
+        """ Count a beta cutoff by the move searched at `index` of a node. """
+        cutoffs = self.cutoffs
+        if index >= len(cutoffs):
+            cutoffs.extend([0] * (index + 1 - len(cutoffs)))
+        cutoffs[index] += 1
+
+    def end_move(self, player, elapsed, tt_hits):
+        """ Read the counters kept by the player at the end of a move and
+        call the callback, if any.
+        """
+        self.moves += 1
+        self.nodes = getattr(player, "nodes", self.leaves)
+        depth_nodes = getattr(player, "depth_nodes", None)
+        self.depth = depth_nodes[-1][0] if depth_nodes else None
+        self.tt_hits = tt_hits
+        self.reduced_moves = getattr(player, "reduced_moves", 0)
+        self.reduction_researches = getattr(player, "reduction_researches", 0)
+        self.time = 1000 * elapsed
+        self.nodes_per_second = self.nodes / elapsed if elapsed else 0.
+        if self.callback is not None:
+            self.callback(self)
@@ -0,0 +1,78 @@
+"""Measure how the depth reached by the Lazy SMP search of AlphaBetaPlayer
+scales with the number of worker processes.
+
+Each configuration searches the same set of random opening positions with a
+fixed time limit per move, and reports the average depth completed by the
+main search and the average number of nodes visited by all workers. Depth
+(not node count) is the measure that matters: helpers only speed up the main
+search through the shared transposition table, so more total nodes does not
+by itself mean a stronger search. Scaling can only be observed up to the
+number of CPU cores of the machine.
+"""
+import multiprocessing
+import random
+import timeit
+
+from isolation import Board
+from sample_players import improved_score
+from game_agent import AlphaBetaPlayer
+
+NUM_POSITIONS = 10  # number of positions searched per configuration
+TIME_LIMIT = 150  # number of milliseconds per search
+MAX_WORKERS = multiprocessing.cpu_count()
+
+
+def random_openings(num_positions, plies=4, seed=0):
+    """Return lists of random opening moves; plies is even, so the first
+    player is to move after each opening.
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < num_positions:
+        game = Board("player_1", "player_2")
+        moves = []
+        for _ in range(plies):
+            move = rng.choice(game.get_legal_moves())
+            game.apply_move(move)
+            moves.append(move)
+        if game.get_legal_moves():
+            openings.append(moves)
+    return openings
+
+
+def measure(workers, openings):
+    """Search every opening with the given number of workers and return the
+    average (main depth, total nodes) per search.
+    """
+    player = AlphaBetaPlayer(score_fn=improved_score, tt_size=2**16,
+                             move_ordering=("hash", "killer", "history"),
+                             workers=workers)
+    depths = nodes = 0
+    try:
+        for moves in openings:
+            game = Board(player, "opponent")
+            for move in moves:
+                game.apply_move(move)
+            start = timeit.default_timer()
+            player.get_move(game, lambda: TIME_LIMIT - 1000 * (timeit.default_timer() - start))
+            if player.depth_nodes:
+                depths += player.depth_nodes[-1][0]
+            nodes += sum(n for n in player.worker_nodes if n) if workers > 1 else player.nodes
+    finally:
+        player.close()
+    return depths / len(openings), nodes / len(openings)
+
+
+def main():
+    openings = random_openings(NUM_POSITIONS)
+    print("{} CPU cores, {} positions, {} ms per search\n".format(
+        MAX_WORKERS, NUM_POSITIONS, TIME_LIMIT))
+    print("{:>7} | {:>9} | {:>11}".format("Workers", "Depth", "Nodes"))
+    print("{:->7}-+-{:->9}-+-{:->11}".format("", "", ""))
+    for workers in range(1, MAX_WORKERS + 1):
+        depth, nodes = measure(workers, openings)
+        print("{:>7} | {:>9.2f} | {:>11.0f}".format(workers, depth, nodes))
+
+
+if __name__ == "__main__":
+    main()
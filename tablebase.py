@@ -0,0 +1,393 @@
+"""This file contains endgame tablebases for Isolation: a generator that
+solves every late-game position with at most K open cells in play by
+retrograde analysis, and a reader that probes the stored results in O(1)
+from memory-mapped files.
+
+Only the open cells that either player can still reach by knight moves
+matter to the outcome, so a position is reduced to its region (the mask of
+those cells) and the locations of the player to move and of its opponent,
+and positions are reduced further by the board symmetries (see
+`opening_book.get_symmetries`). Every move blocks a cell, so the region
+shrinks with each move; the generator solves one region size (level) at a
+time, from the empty region up, looking the successors of each position up
+in the levels already written. Each entry stores whether the player to move
+wins and the number of plies until the game ends with best play (the winner
+ends the game as soon as possible, the loser as late as possible).
+
+Each level is solved in chunks by a pool of processes. Finished chunks and
+levels are written to disk atomically, so an interrupted run resumes from
+the last finished chunk. Run this file to generate the default tables:
+
+    python tablebase.py [directory]
+"""
+import glob
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+
+from endgame import board_masks, reachable
+from isolation.bitboard import get_geometry, popcount
+from opening_book import get_symmetries
+
+MAGIC = b"ISOTB001"
+HEADER = struct.Struct("<8sHHHI")  # magic, width, height, level, slots
+SLOT = struct.Struct("<QBBBB")  # region, active cell, inactive cell, result, distance
+EMPTY = 0xFF  # result value of an empty slot
+LOSS, WIN = 0, 1
+
+TABLE_PATH = "tablebase"  # default table directory
+TABLE_CELLS = 4  # regions of up to this many cells are in the default tables
+NUM_CHUNKS = 64  # number of work units per level
+
+
+def level_path(directory, level):
+    """ Return the path of the table file for a level. """
+    return os.path.join(directory, "level{:02d}.bin".format(level))
+
+
+def chunk_path(directory, level, chunk):
+    """ Return the path of the unindexed results of one chunk of a level. """
+    return os.path.join(directory, "level{:02d}-chunk{:04d}.part".format(level, chunk))
+
+
+def canonical_state(region, active, inactive, symmetries):
+    """Return the representative of the symmetry class of a position.
+
+    Parameters
+    ----------
+    region : int
+        The mask of the open cells in play.
+
+    active, inactive : int
+        The cell indices of the player to move and of its opponent.
+
+    symmetries : list<tuple<int>>
+        The cell index permutations of the board.
+
+    Returns
+    -------
+    (int, int, int)
+        The smallest (region, active, inactive) image of the position.
+    """
+    cells = []
+    mask = region
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        cells.append(low.bit_length() - 1)
+    best = None
+    for perm in symmetries:
+        image = 0
+        for idx in cells:
+            image |= 1 << perm[idx]
+        state = (image, perm[active], perm[inactive])
+        if best is None or state < best:
+            best = state
+    return best
+
+
+def _slot_index(state, slots):
+    region, active, inactive = state
+    return ((region ^ (active << 56) ^ (inactive << 48)) *
+            0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF) % slots
+
+
+class TablebaseLevel(object):
+    """Read-only, memory-mapped table of the positions of one region size.
+
+    Parameters
+    ----------
+    path : str
+        The path of a level file written by `generate`.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as table_file:
+            self._map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.level, self.slots = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a tablebase file: {}".format(path))
+
+    def close(self):
+        """ Unmap the table file. """
+        self._map.close()
+
+    def lookup(self, state):
+        """Return the (result, distance) stored for a canonical state, or
+        None if it is not in the table.
+        """
+        slot = _slot_index(state, self.slots)
+        while True:
+            region, active, inactive, result, distance = SLOT.unpack_from(
+                self._map, HEADER.size + slot * SLOT.size)
+            if result == EMPTY:
+                return None
+            if (region, active, inactive) == state:
+                return result, distance
+            slot = (slot + 1) % self.slots
+
+
+class Tablebase(object):
+    """Probe the tables generated for a board size.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the tables were generated in.
+
+    max_blanks : int (optional)
+        `probe` only looks for the region of positions with at most this many
+        blank cells, which keeps the cost of probing out of the early game.
+
+    Attributes
+    ----------
+    max_cells : int
+        The largest region size covered by the tables.
+
+    probes : int
+        The number of positions whose region was small enough to look up.
+
+    hits : int
+        The number of lookups that found the position.
+    """
+    def __init__(self, directory, max_blanks=16):
+        self.levels = []
+        while os.path.exists(level_path(directory, len(self.levels))):
+            self.levels.append(TablebaseLevel(level_path(directory, len(self.levels))))
+        if not self.levels:
+            raise ValueError("No tablebase files in {}".format(directory))
+        self.width = self.levels[0].width
+        self.height = self.levels[0].height
+        self.max_cells = len(self.levels) - 1
+        self.max_blanks = max_blanks
+        self.probes = 0
+        self.hits = 0
+
+    def close(self):
+        """ Unmap the table files. """
+        for level in self.levels:
+            level.close()
+
+    def probe(self, game):
+        """Look up the result of a game with best play.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The current game.
+
+        Returns
+        -------
+        (bool, int) or None
+            Whether the active player wins, and the number of plies until
+            the game ends, or None if the position is not covered.
+        """
+        if (game.width != self.width or game.height != self.height or
+                game.width * game.height - game.move_count > self.max_blanks):
+            return None
+        geometry, open_cells, active, inactive = board_masks(game)
+        if not active or not inactive:
+            return None
+        region = reachable(active | inactive, open_cells, geometry)
+        size = popcount(region)
+        if size > self.max_cells:
+            return None
+        self.probes += 1
+        state = canonical_state(region, active.bit_length() - 1,
+                                inactive.bit_length() - 1,
+                                get_symmetries(self.width, self.height))
+        entry = self.levels[size].lookup(state)
+        if entry is None:
+            return None
+        self.hits += 1
+        return entry[0] == WIN, entry[1]
+
+
+def canonical_pairs(width, height):
+    """ Return one (active, inactive) cell pair per symmetry class. """
+    symmetries = get_symmetries(width, height)
+    pairs = set()
+    for active in range(width * height):
+        for inactive in range(width * height):
+            if active != inactive:
+                pairs.add(min((perm[active], perm[inactive]) for perm in symmetries))
+    return sorted(pairs)
+
+
+def regions(active, inactive, size, geometry):
+    """Yield every region of exactly `size` cells for the given locations:
+    sets of cells (excluding both locations) in which every cell can be
+    reached by knight moves from one of the locations.
+    """
+    attacks = geometry.attacks
+    occupied = (1 << active) | (1 << inactive)
+    seeds = (attacks[active] | attacks[inactive]) & ~occupied
+
+    # Grow connected sets without repetition (Redelmeier's algorithm): each
+    # cell is either added or excluded for good when it is first considered
+    def grow(region, untried, seen, count):
+        if count == size:
+            yield region
+            return
+        while untried:
+            low = untried & -untried
+            untried ^= low
+            fresh = attacks[low.bit_length() - 1] & ~seen & ~occupied
+            yield from grow(region | low, untried | fresh, seen | fresh, count + 1)
+
+    yield from grow(0, seeds, seeds | occupied, 0)
+
+
+def solve_state(region, active, inactive, geometry, lower, symmetries):
+    """Solve a position from the results of the smaller regions.
+
+    Parameters
+    ----------
+    region : int
+        The mask of the open cells in play.
+
+    active, inactive : int
+        The cell indices of the player to move and of its opponent.
+
+    geometry : _Geometry
+        The geometry tables of the board.
+
+    lower : list<TablebaseLevel>
+        The tables of every smaller region size.
+
+    symmetries : list<tuple<int>>
+        The cell index permutations of the board.
+
+    Returns
+    -------
+    (int, int)
+        `WIN` or `LOSS` for the player to move, and the number of plies
+        until the game ends.
+    """
+    moves = geometry.attacks[active] & region
+    best_win = None
+    longest_loss = 0
+    while moves:
+        move = moves & -moves
+        moves ^= move
+        rest = region & ~move
+        successor = reachable(move | (1 << inactive), rest, geometry)
+        state = canonical_state(successor, inactive, move.bit_length() - 1, symmetries)
+        result, distance = lower[popcount(successor)].lookup(state)
+        if result == LOSS:
+            if best_win is None or distance + 1 < best_win:
+                best_win = distance + 1
+        else:
+            longest_loss = max(longest_loss, distance + 1)
+    if best_win is not None:
+        return WIN, best_win
+    return LOSS, longest_loss
+
+
+# Tables of the smaller levels, opened once in each worker process
+_LOWER = None
+
+
+def _init_worker(directory, level):
+    global _LOWER
+    _LOWER = [TablebaseLevel(level_path(directory, lower)) for lower in range(level)]
+
+
+def _solve_chunk(job):
+    """ Pool task: solve every region of one level for a list of cell pairs. """
+    chunk, pairs, width, height, level = job
+    geometry = get_geometry(width, height)
+    symmetries = get_symmetries(width, height)
+    entries = {}
+    for active, inactive in pairs:
+        for region in regions(active, inactive, level, geometry):
+            state = canonical_state(region, active, inactive, symmetries)
+            if state not in entries:
+                entries[state] = solve_state(region, active, inactive,
+                                             geometry, _LOWER, symmetries)
+    return chunk, b"".join(SLOT.pack(*(state + value)) for state, value in entries.items())
+
+
+def _write_atomic(path, data):
+    with open(path + ".tmp", "wb") as out:
+        out.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def _merge_level(directory, width, height, level, num_chunks):
+    """ Index the chunk results of a level into its table file. """
+    entries = {}
+    for chunk in range(num_chunks):
+        with open(chunk_path(directory, level, chunk), "rb") as part:
+            for record in SLOT.iter_unpack(part.read()):
+                entries[record[:3]] = record
+    slots = max(1, 2 * len(entries))
+    table = [(0, 0, 0, EMPTY, 0)] * slots
+    for state, record in entries.items():
+        slot = _slot_index(state, slots)
+        while table[slot][3] != EMPTY:
+            slot = (slot + 1) % slots
+        table[slot] = record
+    data = HEADER.pack(MAGIC, width, height, level, slots)
+    data += b"".join(SLOT.pack(*record) for record in table)
+    _write_atomic(level_path(directory, level), data)
+    for chunk in range(num_chunks):
+        os.remove(chunk_path(directory, level, chunk))
+    return len(entries)
+
+
+def generate(directory, width=7, height=7, max_cells=TABLE_CELLS,
+             processes=None, num_chunks=NUM_CHUNKS, verbose=False):
+    """Generate (or finish generating) the tables of every region size up
+    to `max_cells` in a directory.
+
+    Parameters
+    ----------
+    directory : str
+        The directory for the table files; levels and chunks already in it
+        are kept, so an interrupted run can be resumed.
+
+    width, height : int (optional)
+        The board size.
+
+    max_cells : int (optional)
+        The largest region size to solve.
+
+    processes : int (optional)
+        The number of worker processes (by default, one per CPU core).
+
+    num_chunks : int (optional)
+        The number of work units each level is split into.
+
+    verbose : bool (optional)
+        If True, print progress.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, "*.tmp")):
+        os.remove(stale)
+    pairs = canonical_pairs(width, height)
+    for level in range(max_cells + 1):
+        if os.path.exists(level_path(directory, level)):
+            continue
+        jobs = [(chunk, pairs[chunk::num_chunks], width, height, level)
+                for chunk in range(num_chunks)
+                if not os.path.exists(chunk_path(directory, level, chunk))]
+        if jobs:
+            with multiprocessing.Pool(processes, initializer=_init_worker,
+                                      initargs=(directory, level)) as pool:
+                for chunk, data in pool.imap_unordered(_solve_chunk, jobs):
+                    _write_atomic(chunk_path(directory, level, chunk), data)
+        count = _merge_level(directory, width, height, level, num_chunks)
+        if verbose:
+            print("level {}: {} positions".format(level, count))
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else TABLE_PATH
+    generate(directory, verbose=True)
+
+
+if __name__ == "__main__":
+    main()
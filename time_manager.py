@@ -0,0 +1,163 @@
+"""This file contains a time manager for iterative deepening search.
+
+Without one, `AlphaBetaPlayer` deepens until the timer aborts the search,
+which throws away the last (and most expensive) pass. The time manager
+predicts the cost of the next pass from the effective branching factor
+observed in the previous passes, and stops before starting a pass that
+cannot finish. It also stops early when the result is decided or the best
+move has been stable for several passes, and can spread a whole-game clock
+over the remaining moves so that the time saved on easy moves is banked for
+the harder ones.
+"""
+import timeit
+
+
+class TimeManager(object):
+    """Decide when iterative deepening should stop.
+
+    Parameters
+    ----------
+    game_clock : bool (optional)
+        If False, the time_left() passed to get_move() is the time for this
+        move, and the whole of it may be used. If True, it is the time left
+        for the rest of the game: each move gets an even share of it over
+        the estimated number of moves to go (at most `max_ratio` times that
+        share when a pass is predicted to need it), and time left unused
+        stays on the clock for later moves.
+
+    max_ratio : float (optional)
+        In game clock mode, the hard limit for a move as a multiple of its
+        share of the clock.
+
+    stable_passes : int (optional)
+        Stop once the best move has not changed for this many passes...
+
+    stable_fraction : float (optional)
+        ...and at least this fraction of the move's time has been used.
+
+    Attributes
+    ----------
+    stops : dict
+        The number of searches stopped for each reason: "forced" (a single
+        legal move), "decided" (a proven win or loss), "stable" (the best
+        move stopped changing), and "predicted" (the next pass would not
+        finish in time). Searches aborted by the timer are not counted.
+    """
+    def __init__(self, game_clock=False, max_ratio=3., stable_passes=4,
+                 stable_fraction=.3):
+        self.game_clock = game_clock
+        self.max_ratio = max_ratio
+        self.stable_passes = stable_passes
+        self.stable_fraction = stable_fraction
+        self.stops = {"forced": 0, "decided": 0, "stable": 0, "predicted": 0}
+
+    def start(self, game, time_left, threshold):
+        """Start timing a move.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            The game to search.
+
+        time_left : callable
+            The time_left() function passed to get_move().
+
+        threshold : float
+            The number of milliseconds the search keeps in reserve (the
+            player's `TIMER_THRESHOLD`).
+
+        Returns
+        -------
+        callable
+            The time_left() function the search should use: the time left
+            before the hard limit for this move.
+        """
+        self._start = timeit.default_timer()
+        self.threshold = threshold
+        available = time_left()
+        if self.game_clock:
+            blanks = game.width * game.height - game.move_count
+            # roughly a quarter of the blank cells become moves of this player
+            self.budget = available / max(1, blanks // 4)
+            hard_limit = min(available, self.max_ratio * self.budget)
+        else:
+            self.budget = hard_limit = available
+        self._passes = []
+        self._last_move = None
+        self._stable = 0
+        start = self._start
+        return lambda: min(time_left(), hard_limit - 1000 * (timeit.default_timer() - start))
+
+    def elapsed(self):
+        """ Return the milliseconds since `start()`. """
+        return 1000 * (timeit.default_timer() - self._start)
+
+    def stop(self, reason):
+        """ Record that a search stopped for the given reason. """
+        self.stops[reason] += 1
+
+    def pass_completed(self, depth, nodes, best_move, score):
+        """Record a completed iterative deepening pass and decide whether to
+        start the next one.
+
+        Parameters
+        ----------
+        depth : int
+            The depth of the pass.
+
+        nodes : int
+            The cumulative node count at the end of the pass.
+
+        best_move : (int, int)
+            The best move found by the pass.
+
+        score : float
+            The score of the root found by the pass.
+
+        Returns
+        -------
+        bool
+            True if the search should stop and return `best_move`.
+        """
+        elapsed = self.elapsed()
+        previous_nodes = self._passes[-1][1] if self._passes else 0
+        previous_time = self._passes[-1][2] if self._passes else 0.
+        self._passes.append((nodes - previous_nodes, nodes, elapsed,
+                             elapsed - previous_time))
+        if best_move == self._last_move:
+            self._stable += 1
+        else:
+            self._stable = 0
+        self._last_move = best_move
+
+        if score in (float("inf"), float("-inf")):
+            self.stop("decided")
+            return True
+        if (self._stable >= self.stable_passes and
+                elapsed >= self.stable_fraction * self.budget):
+            self.stop("stable")
+            return True
+        if elapsed + self.predict() > self.budget - self.threshold:
+            self.stop("predicted")
+            return True
+        return False
+
+    def predict(self):
+        """Return the predicted milliseconds of the next pass: the nodes of
+        the last pass times the effective branching factor (the geometric
+        mean of the growth of the last two passes), at the node rate of the
+        last pass.
+        """
+        passes = self._passes
+        last_nodes, _, _, last_time = passes[-1]
+        if len(passes) < 2 or not last_nodes:
+            return last_time
+        ratios = [passes[i][0] / passes[i - 1][0] for i in (-1, -2)
+                  if -i < len(passes) and passes[i - 1][0]]
+        if not ratios:
+            return last_time
+        branching = 1.
+        for ratio in ratios:
+            branching *= ratio
+        branching **= 1. / len(ratios)
+        return last_time * max(1., branching)
@@ -15,16 +15,18 @@ import itertools
 import random
 import warnings
 
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 
 from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
+from search_stats import SearchStats
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
+SEARCH_STATS = False  # print the search statistics of the test agents
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
@@ -124,6 +126,37 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
+def collect_stats(totals):
+    """Return a `SearchStats` callback that adds the counters of each move
+    to a dict of totals.
+    """
+    def callback(stats):
+        totals["moves"] += 1
+        totals["nodes"] += stats.nodes
+        totals["leaves"] += stats.leaves
+        totals["cutoffs"] += sum(stats.cutoffs)
+        totals["first_cutoffs"] += stats.cutoffs[0] if stats.cutoffs else 0
+        totals["tt_hits"] += stats.tt_hits
+        totals["depth"] += stats.depth or 0
+        totals["time"] += stats.time
+    return callback
+
+
+def print_stats(test_agents, totals):
+    """ Print the search statistics of each test agent per move. """
+    print("\n{:^13}{:>8}{:>10}{:>10}{:>8}{:>9}{:>10}".format(
+        "Agent", "Depth", "Nodes", "Nodes/s", "Cut@1", "TT hits", "Time (ms)"))
+    for agent in test_agents:
+        agent_totals = totals[agent.name]
+        moves = agent_totals["moves"] or 1
+        seconds = agent_totals["time"] / 1000
+        print("{:^13}{:>8.2f}{:>10.0f}{:>10.0f}{:>8.1%}{:>9.0f}{:>10.1f}".format(
+            agent.name, agent_totals["depth"] / moves, agent_totals["nodes"] / moves,
+            agent_totals["nodes"] / seconds if seconds else 0.,
+            agent_totals["first_cutoffs"] / (agent_totals["cutoffs"] or 1),
+            agent_totals["tt_hits"] / moves, agent_totals["time"] / moves))
+
+
 def main():
 
     # Define two agents to compare -- these agents will play from the same
@@ -146,11 +179,18 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
     ]
 
+    totals = defaultdict(lambda: defaultdict(float))
+    if SEARCH_STATS:
+        for agent in test_agents:
+            SearchStats(collect_stats(totals[agent.name])).attach(agent.player)
+
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
     play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    if SEARCH_STATS:
+        print_stats(test_agents, totals)
 
 
 if __name__ == "__main__":
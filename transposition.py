@@ -0,0 +1,261 @@
+"""This file contains a fixed-size transposition table for caching search
+results by position hash (see `isolation.Board.hash()`) across the nodes of
+a search, the passes of iterative deepening, and successive moves.
+"""
+import struct
+from multiprocessing import shared_memory
+
+# Bound types for stored scores
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable(object):
+    """Transposition table with a fixed entry budget.
+
+    The table is split into buckets of two slots. The first slot of each
+    bucket is depth-preferred: it is only replaced by an entry searched at
+    least as deep, or when it was stored during an earlier search (see
+    `new_search`). The second slot always takes the newest entry, so recent
+    shallow results are kept too. Slots are allocated up front, so memory
+    stays flat no matter how many positions are searched.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The maximum number of entries to keep (rounded down to an even
+        number of slots, with a minimum of one bucket).
+
+    Attributes
+    ----------
+    hits : int
+        The number of probes that found an entry for the key.
+
+    misses : int
+        The number of probes that did not find an entry for the key.
+
+    stores : int
+        The number of entries written.
+
+    overwrites : int
+        The number of stores that evicted an entry for a different key.
+    """
+    def __init__(self, size=2**16):
+        self.buckets = max(1, size // 2)
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        """ Remove every entry and reset the counters. """
+        # Each slot holds None or (key, depth, score, flag, move, generation)
+        self._slots = [None] * (2 * self.buckets)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Start a new search generation. Entries from earlier generations
+        can still be probed, but lose their claim on the depth-preferred
+        slot of their bucket.
+        """
+        self.generation += 1
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
+
+    @property
+    def hit_rate(self):
+        """ The fraction of probes that found an entry. """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.
+
+    def probe(self, key):
+        """Look up the entry stored for a position.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position.
+
+        Returns
+        -------
+        (int, float, int, (int, int)) or None
+            The (depth, score, bound type, best move) stored for the key, or
+            None if there is no entry.
+        """
+        idx = 2 * (key % self.buckets)
+        entry = self._slots[idx]
+        if entry is None or entry[0] != key:
+            entry = self._slots[idx + 1]
+            if entry is None or entry[0] != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry[1:5]
+
+    def store(self, key, depth, score, flag, move):
+        """Record the result of searching a position.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position.
+
+        depth : int
+            The remaining search depth the score was computed with.
+
+        score : float
+            The score of the position.
+
+        flag : int
+            `EXACT` if the score is exact, `LOWER` if it is a lower bound
+            (the search failed high), or `UPPER` if it is an upper bound (the
+            search failed low).
+
+        move : (int, int)
+            The best move found in the position.
+        """
+        idx = 2 * (key % self.buckets)
+        slots = self._slots
+        entry = (key, depth, score, flag, move, self.generation)
+        preferred = slots[idx]
+        other = slots[idx + 1]
+        if (preferred is None or preferred[0] == key or depth >= preferred[1]
+                or preferred[5] != self.generation):
+            if preferred is not None and preferred[0] != key:
+                self.overwrites += 1
+            slots[idx] = entry
+            if other is not None and other[0] == key:
+                slots[idx + 1] = None
+        else:
+            if other is not None and other[0] != key:
+                self.overwrites += 1
+            slots[idx + 1] = entry
+        self.stores += 1
+
+
+class SharedTranspositionTable(object):
+    """Transposition table stored in a `multiprocessing.shared_memory` block
+    so that several search processes can share results (e.g., the helpers of
+    a Lazy SMP search). It has the same interface and the same two-slot
+    bucket replacement scheme as `TranspositionTable`; counters are kept
+    per process.
+
+    Entries are written without locks. Each entry stores its key XORed with
+    its packed data, so an entry torn by a concurrent write reads back as a
+    miss instead of as a wrong result.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The maximum number of entries to keep.
+
+    name : str (optional)
+        The name of an existing shared memory block to attach to; by default
+        a new block is created (and unlinked by `close()`).
+    """
+    # check word, then score, depth, flag (+1, so 0 marks an empty slot),
+    # generation, and the best move (row, column)
+    ENTRY = struct.Struct("<QdhBBbbxx")
+
+    def __init__(self, size=2**16, name=None):
+        self.buckets = max(1, size // 2)
+        self.generation = 0
+        self._owner = name is None
+        nbytes = 2 * self.buckets * self.ENTRY.size
+        self._shm = shared_memory.SharedMemory(name=name, create=name is None,
+                                               size=nbytes)
+        if self._owner:
+            self._shm.buf[:nbytes] = bytes(nbytes)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __reduce__(self):
+        # child processes attach to the same block by name
+        return (SharedTranspositionTable, (2 * self.buckets, self._shm.name))
+
+    @property
+    def name(self):
+        """ The name of the shared memory block. """
+        return self._shm.name
+
+    def close(self):
+        """ Detach from the shared block, and unlink it if this table created it. """
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def clear(self):
+        """ Remove every entry and reset the counters. """
+        nbytes = 2 * self.buckets * self.ENTRY.size
+        self._shm.buf[:nbytes] = bytes(nbytes)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """ Start a new search generation; see `TranspositionTable.new_search`. """
+        self.generation = (self.generation + 1) % 256
+
+    def __len__(self):
+        return sum(1 for idx in range(2 * self.buckets) if self._read(idx) is not None)
+
+    @property
+    def hit_rate(self):
+        """ The fraction of probes that found an entry. """
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.
+
+    def _read(self, idx):
+        """ Return the entry in slot idx as stored by `TranspositionTable`, or None. """
+        offset = idx * self.ENTRY.size
+        raw = bytes(self._shm.buf[offset:offset + self.ENTRY.size])
+        check, score, depth, flag, generation, row, col = self.ENTRY.unpack(raw)
+        if not flag:
+            return None
+        key = check ^ int.from_bytes(raw[8:16], "little") ^ int.from_bytes(raw[16:24], "little")
+        return (key, depth, score, flag - 1, (row, col), generation)
+
+    def _write(self, idx, key, depth, score, flag, move):
+        offset = idx * self.ENTRY.size
+        raw = bytearray(self.ENTRY.pack(0, score, depth, flag + 1, self.generation,
+                                        move[0], move[1]))
+        check = key ^ int.from_bytes(raw[8:16], "little") ^ int.from_bytes(raw[16:24], "little")
+        raw[0:8] = check.to_bytes(8, "little")
+        self._shm.buf[offset:offset + self.ENTRY.size] = raw
+
+    def probe(self, key):
+        """ Look up the entry stored for a position; see `TranspositionTable.probe`. """
+        idx = 2 * (key % self.buckets)
+        entry = self._read(idx)
+        if entry is None or entry[0] != key:
+            entry = self._read(idx + 1)
+            if entry is None or entry[0] != key:
+                self.misses += 1
+                return None
+        self.hits += 1
+        return entry[1:5]
+
+    def store(self, key, depth, score, flag, move):
+        """ Record the result of searching a position; see `TranspositionTable.store`. """
+        idx = 2 * (key % self.buckets)
+        preferred = self._read(idx)
+        other = self._read(idx + 1)
+        if (preferred is None or preferred[0] == key or depth >= preferred[1]
+                or preferred[5] != self.generation):
+            if preferred is not None and preferred[0] != key:
+                self.overwrites += 1
+            self._write(idx, key, depth, score, flag, move)
+            if other is not None and other[0] == key:
+                offset = (idx + 1) * self.ENTRY.size
+                self._shm.buf[offset:offset + self.ENTRY.size] = bytes(self.ENTRY.size)
+        else:
+            if other is not None and other[0] != key:
+                self.overwrites += 1
+            self._write(idx + 1, key, depth, score, flag, move)
+        self.stores += 1